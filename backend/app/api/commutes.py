@@ -1,24 +1,34 @@
 """Commute management - save routes, track history, learn patterns."""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from collections import OrderedDict
 from typing import Optional
-from datetime import datetime
-import uuid
+from datetime import datetime, timezone
+import hashlib
 
+from app.ids import new_id
 from app.models import Commute, CommuteCreate, CommuteHistory, RouteRequest
+from app.services.scheduler import activate_commute, deactivate_commute
 from app.services.storage import CommuteStorage
 
 
+UTC = timezone.utc
+
+
 router = APIRouter()
 storage = CommuteStorage()
 
+# commute_id -> (history version, analyzed patterns), LRU order
+_PATTERNS_CACHE_MAX_ENTRIES = 1024
+_patterns_cache: OrderedDict[str, tuple[str, dict]] = OrderedDict()
+
 
 @router.post("/", response_model=Commute)
 async def create_commute(commute: CommuteCreate):
     """Save a new commute for tracking."""
     new_commute = Commute(
         **commute.model_dump(),
-        id=str(uuid.uuid4()),
-        created_at=datetime.utcnow(),
+        id=new_id(),
+        created_at=datetime.now(UTC),
     )
     await storage.save_commute(new_commute)
     return new_commute
@@ -45,6 +55,8 @@ async def delete_commute(commute_id: str):
     success = await storage.delete_commute(commute_id)
     if not success:
         raise HTTPException(status_code=404, detail="Commute not found")
+    deactivate_commute(commute_id)
+    _patterns_cache.pop(commute_id, None)
     return {"status": "deleted"}
 
 
@@ -61,7 +73,7 @@ async def start_commute(commute_id: str):
     # Create history entry
     history = CommuteHistory(
         commute_id=commute_id,
-        started_at=datetime.utcnow(),
+        started_at=datetime.now(UTC),
     )
     history_id = await storage.save_history(history)
 
@@ -75,6 +87,13 @@ async def start_commute(commute_id: str):
         dest_lng=commute.dest_lng,
     ))
 
+    # Keep re-checking routes while the user is driving
+    activate_commute(
+        commute_id,
+        (commute.origin_lat, commute.origin_lng),
+        (commute.dest_lat, commute.dest_lng),
+    )
+
     return {
         "history_id": history_id,
         "routes": route_comparison,
@@ -91,8 +110,12 @@ async def end_commute(commute_id: str, history_id: str, route_taken: Optional[st
     if not history:
         raise HTTPException(status_code=404, detail="History entry not found")
 
-    ended_at = datetime.utcnow()
-    duration = (ended_at - history.started_at).total_seconds() / 60
+    ended_at = datetime.now(UTC)
+    started_at = history.started_at
+    if started_at.tzinfo is None:
+        # Entries recorded before timestamps were tz-aware are naive UTC
+        started_at = started_at.replace(tzinfo=UTC)
+    duration = (ended_at - started_at).total_seconds() / 60
 
     await storage.update_history(
         history_id,
@@ -103,6 +126,7 @@ async def end_commute(commute_id: str, history_id: str, route_taken: Optional[st
 
     # Update commute stats
     await storage.update_commute_stats(commute_id)
+    deactivate_commute(commute_id)
 
     return {
         "duration_minutes": duration,
@@ -117,20 +141,40 @@ async def get_commute_history(commute_id: str, limit: int = 30):
 
 
 @router.get("/{commute_id}/patterns")
-async def get_commute_patterns(commute_id: str):
+async def get_commute_patterns(commute_id: str, request: Request, response: Response):
     """
     Analyze historical patterns for this commute.
     Returns best/worst times, day-of-week patterns, etc.
+
+    Results only change when the commute's history does, so responses carry
+    an ETag and conditional requests get a 304.
     """
-    history = await storage.get_history_for_commute(commute_id, limit=90)
+    version = storage.get_history_version(commute_id)
+    etag = '"' + hashlib.blake2b(f"{commute_id}:{version}".encode(), digest_size=8).hexdigest() + '"'
 
-    if not history:
-        return {"message": "Not enough data yet", "trips_recorded": 0}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
 
-    # Analyze patterns
-    from app.ml.patterns import analyze_commute_patterns
-    patterns = analyze_commute_patterns(history)
+    cached = _patterns_cache.get(commute_id)
+    if cached and cached[0] == version:
+        _patterns_cache.move_to_end(commute_id)
+        return cached[1]
 
+    history = await storage.get_history_for_commute(commute_id, limit=90)
+
+    if not history:
+        patterns = {"message": "Not enough data yet", "trips_recorded": 0}
+    else:
+        # Analyze patterns
+        from app.ml.patterns import analyze_commute_patterns
+        patterns = analyze_commute_patterns(history)
+
+    _patterns_cache[commute_id] = (version, patterns)
+    _patterns_cache.move_to_end(commute_id)
+    if len(_patterns_cache) > _PATTERNS_CACHE_MAX_ENTRIES:
+        _patterns_cache.popitem(last=False)
     return patterns
 
 
@@ -144,8 +188,8 @@ async def get_commute_incidents(commute_id: str):
     if not commute:
         raise HTTPException(status_code=404, detail="Commute not found")
 
-    from app.services.routing import RoutingService
-    routing = RoutingService()
+    from app.services.routing import get_routing_service
+    routing = get_routing_service()
 
     incidents = await routing.get_incidents(
         origin=(commute.origin_lat, commute.origin_lng),
@@ -165,10 +209,9 @@ async def get_commute_weather(commute_id: str):
     if not commute:
         raise HTTPException(status_code=404, detail="Commute not found")
 
-    from app.services.weather import WeatherService
-    weather_service = WeatherService()
+    from app.services.weather import get_weather_service
 
-    weather = await weather_service.get_route_weather(
+    weather = await get_weather_service().get_route_weather(
         origin=(commute.origin_lat, commute.origin_lng),
         destination=(commute.dest_lat, commute.dest_lng),
     )
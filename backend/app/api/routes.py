@@ -1,24 +1,84 @@
 """Route calculation and comparison endpoints."""
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
 from fastapi import APIRouter, HTTPException
 
+from app.config import get_settings
 from app.models import RouteRequest, RouteOption, RouteComparison, Coordinate
-from app.services.routing import RoutingService
+from app.services.routing import get_routing_service
 from app.services.traffic import TrafficAggregator
 from app.ml.predictor import TrafficPredictor
 
 
 router = APIRouter()
-routing_service = RoutingService()
+routing_service = get_routing_service()
 traffic_aggregator = TrafficAggregator()
 predictor = TrafficPredictor()
 
+# Short-lived cache of route comparisons, keyed on quantized endpoints
+# and departure minute; LRU order
+_ROUTE_CACHE_MAX_ENTRIES = 10_000
+_route_cache: OrderedDict[tuple, tuple[RouteComparison, float]] = OrderedDict()
+
+
+def _departure_minute(departure_time: Optional[str]) -> Optional[str]:
+    """Bucket an ISO departure time to the minute (UTC if it has an offset)."""
+    if not departure_time:
+        return None
+    try:
+        departure = datetime.fromisoformat(departure_time)
+    except ValueError:
+        return departure_time
+    if departure.tzinfo is not None:
+        departure = departure.astimezone(timezone.utc)
+    return departure.replace(second=0, microsecond=0).isoformat()
+
+
+def _route_cache_key(request: RouteRequest) -> tuple:
+    """Quantize coordinates to ~11m so nearby repeat requests share an entry."""
+    return (
+        round(request.origin_lat, 4),
+        round(request.origin_lng, 4),
+        round(request.dest_lat, 4),
+        round(request.dest_lng, 4),
+        _departure_minute(request.departure_time),
+    )
+
+
+def _cached_route_comparison(key: tuple, ttl: float) -> Optional[RouteComparison]:
+    cached = _route_cache.get(key)
+    if cached is None:
+        return None
+    if time.monotonic() - cached[1] >= ttl:
+        del _route_cache[key]
+        return None
+    _route_cache.move_to_end(key)
+    return cached[0]
+
+
+def _store_route_comparison(key: tuple, comparison: RouteComparison):
+    """Cache a comparison, evicting the least recently used entry when full."""
+    _route_cache[key] = (comparison, time.monotonic())
+    _route_cache.move_to_end(key)
+    if len(_route_cache) > _ROUTE_CACHE_MAX_ENTRIES:
+        _route_cache.popitem(last=False)
+
 
 @router.post("/calculate", response_model=RouteComparison)
 async def calculate_routes(request: RouteRequest):
     """
     Calculate multiple route options with ML-enhanced traffic predictions.
     Returns current best route and alternatives with switch recommendations.
+    Results are cached for `cache_ttl_seconds` per origin/destination pair.
     """
+    settings = get_settings()
+    cache_key = _route_cache_key(request)
+    cached = _cached_route_comparison(cache_key, settings.cache_ttl_seconds)
+    if cached is not None:
+        return cached
+
     try:
         # Get base routes from routing service
         routes = await routing_service.get_routes(
@@ -33,14 +93,15 @@ async def calculate_routes(request: RouteRequest):
         # Get current traffic for each route
         traffic_data = await traffic_aggregator.get_traffic_for_routes(routes)
 
-        # Apply ML predictions
+        # Apply ML predictions (one batched model call for all routes)
+        predicted_durations = predictor.predict_duration_batch(
+            routes=routes,
+            current_traffic=traffic_data,
+            horizon_minutes=30,
+        )
+
         enhanced_routes = []
-        for route, traffic in zip(routes, traffic_data):
-            predicted_duration = predictor.predict_duration(
-                route=route,
-                current_traffic=traffic,
-                horizon_minutes=30,
-            )
+        for route, traffic, predicted_duration in zip(routes, traffic_data, predicted_durations):
             enhanced_routes.append({
                 **route,
                 "predicted_duration_minutes": predicted_duration,
@@ -63,9 +124,6 @@ async def calculate_routes(request: RouteRequest):
         recommendation_reason = None
 
         # This is where the "aggressive rerouting" logic lives
-        from app.config import get_settings
-        settings = get_settings()
-
         for alt in alternatives:
             if alt["savings_vs_current"] >= settings.reroute_threshold_minutes:
                 recommended_switch = alt["id"]
@@ -75,19 +133,22 @@ async def calculate_routes(request: RouteRequest):
                 )
                 break
 
-        # Convert geometry to Coordinate objects
-        current["geometry"] = [Coordinate(**p) for p in current.get("geometry", [])]
+        # Convert geometry to Coordinate objects. Everything here was built
+        # internally from provider data, so skip per-point validation.
+        current["geometry"] = [Coordinate.model_construct(lat=lat, lng=lng) for lat, lng in current.get("geometry", [])]
         current["savings_vs_current"] = 0
 
         for alt in alternatives:
-            alt["geometry"] = [Coordinate(**p) for p in alt.get("geometry", [])]
+            alt["geometry"] = [Coordinate.model_construct(lat=lat, lng=lng) for lat, lng in alt.get("geometry", [])]
 
-        return RouteComparison(
-            current_route=RouteOption(**current),
-            alternatives=[RouteOption(**alt) for alt in alternatives],
+        comparison = RouteComparison.model_construct(
+            current_route=RouteOption.model_construct(**current),
+            alternatives=[RouteOption.model_construct(**alt) for alt in alternatives],
             recommended_switch=recommended_switch,
             recommendation_reason=recommendation_reason,
         )
+        _store_route_comparison(cache_key, comparison)
+        return comparison
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
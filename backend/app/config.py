@@ -12,6 +12,8 @@ class Settings(BaseSettings):
 
     # Polling and rerouting
     poll_interval_seconds: int = 60
+    poll_max_interval_seconds: int = 600  # Backoff cap while nothing changes
+    poll_concurrency: int = 20  # Max commutes re-routed at once per tick
     reroute_threshold_minutes: float = 2.0  # Alert if alternate saves this much time
 
     # ML model settings
@@ -20,6 +22,11 @@ class Settings(BaseSettings):
 
     # Cache settings
     cache_ttl_seconds: int = 30
+    route_cache_ttl_seconds: int = 30  # Upstream routing responses
+    route_cache_stale_seconds: int = 600  # Serve stale while refreshing
+
+    # Max routes whose traffic is fetched concurrently (provider rate limits)
+    traffic_max_concurrency: int = 8
 
     debug: bool = False
 
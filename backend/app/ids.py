@@ -0,0 +1,42 @@
+"""Identifier generation shared by storage and request logging."""
+import os
+import time
+import uuid
+
+
+# Random bytes are drawn from a pooled buffer to avoid one syscall per ID
+_RANDOM_POOL_SIZE = 4096
+_random_pool = b""
+_random_offset = 0
+
+
+def _random_bytes(n: int) -> bytes:
+    global _random_pool, _random_offset
+    if _random_offset + n > len(_random_pool):
+        _random_pool = os.urandom(_RANDOM_POOL_SIZE)
+        _random_offset = 0
+    chunk = _random_pool[_random_offset:_random_offset + n]
+    _random_offset += n
+    return chunk
+
+
+def _reset_random_pool():
+    # A forked worker must not hand out the parent's remaining pooled bytes
+    global _random_pool, _random_offset
+    _random_pool = b""
+    _random_offset = 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_random_pool)
+
+
+def new_id() -> str:
+    """
+    Generate a time-ordered UUIDv7 string.
+    48-bit millisecond timestamp followed by 74 random bits.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(_random_bytes(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return str(uuid.UUID(int=value))
@@ -0,0 +1,90 @@
+"""
+Logging setup and request correlation.
+
+Records are handed to a QueueHandler and written by a QueueListener thread,
+so a burst of errors (e.g. a provider outage) never blocks the event loop
+on stdout. Each record carries the X-Request-ID of the request it was
+logged under.
+"""
+import logging
+import logging.handlers
+import queue
+from contextvars import ContextVar
+
+from app.ids import new_id
+
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+_MAX_REQUEST_ID_LENGTH = 64
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp the current request ID onto each record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+def configure_logging(level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """
+    Route the `app` logger through a background writer thread.
+    Returns the started listener; stop it on shutdown to flush.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    # The filter runs on the emitting side, where the request context is set
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(
+        "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+    ))
+
+    logger = logging.getLogger("app")
+    logger.setLevel(level)
+    logger.handlers = [queue_handler]
+    logger.propagate = False
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    return listener
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware that binds a request ID for logging and echoes it back
+    as X-Request-ID. A well-formed incoming header is reused.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if 0 < len(candidate) <= _MAX_REQUEST_ID_LENGTH and candidate.isprintable():
+                    request_id = candidate
+                break
+        if request_id is None:
+            request_id = new_id()
+        header = (b"x-request-id", request_id.encode("latin-1"))
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
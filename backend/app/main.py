@@ -2,22 +2,53 @@
 Wayfinder - Smart Commute Optimizer
 FastAPI backend with ML-based traffic prediction and aggressive rerouting
 """
+import os
+
+# The model is tiny; keep BLAS/OpenMP from spawning a thread pool per worker.
+# Must be set before numpy/sklearn are imported.
+for _var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ.setdefault(_var, "1")
+
+import asyncio
 from contextlib import asynccontextmanager
+from typing import Any
+import orjson
 from fastapi import FastAPI
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.api import routes, commutes
+from app.log import RequestIdMiddleware, configure_logging
+from app.services.http_client import close_http_client
+from app.services.routing import get_routing_service
 from app.services.scheduler import start_scheduler, stop_scheduler
 
 
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (also serializes numpy arrays)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage startup and shutdown events."""
+    log_listener = configure_logging()
     # Startup: begin background traffic polling
     await start_scheduler()
+    # Run a dummy prediction so the first real request doesn't pay warm-up
+    routes.predictor.warm_up()
+    # Pre-connect to routing providers in the background; startup doesn't wait
+    warm_task = asyncio.create_task(get_routing_service().warm_connections())
     yield
     # Shutdown: clean up
+    warm_task.cancel()
     await stop_scheduler()
+    await commutes.storage.aclose()
+    await close_http_client()
+    log_listener.stop()
 
 
 app = FastAPI(
@@ -25,6 +56,9 @@ app = FastAPI(
     description="ML-powered commute optimizer with aggressive rerouting",
     version="0.1.0",
     lifespan=lifespan,
+    # Wrapped in Default() so routes with a response_model keep FastAPI's
+    # direct Pydantic-to-JSON path where available; the rest use orjson
+    default_response_class=Default(ORJSONResponse),
 )
 
 # CORS for frontend
@@ -34,7 +68,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
+app.add_middleware(RequestIdMiddleware)
 
 # API routes
 app.include_router(routes.router, prefix="/api/routes", tags=["routes"])
@@ -8,122 +8,196 @@ Key features that predict traffic:
 4. Trend: is traffic getting worse or better?
 """
 from datetime import datetime
+from functools import lru_cache
+from typing import Optional
 import numpy as np
 
 
+# Length of the feature vector; must match get_feature_names()
+NUM_FEATURES = 16
+
+# All features are ratios or cyclic encodings, so single precision is plenty
+FEATURE_DTYPE = np.float32
+
+# Per-hour rush flags packed as (is_morning_rush << 1) | is_evening_rush
+_HOUR_RUSH_LUT = bytes(
+    (2 if 7 <= h <= 9 else 0) | (1 if 16 <= h <= 19 else 0) for h in range(24)
+)
+# Per-weekday weekend flag (0=Monday)
+_WEEKEND_LUT = bytes([0, 0, 0, 0, 0, 1, 1])
+
+
+# Traffic level as numeric
+_TRAFFIC_LEVEL_VALUES = {
+    "free": 1.0,
+    "light": 0.8,
+    "moderate": 0.6,
+    "heavy": 0.4,
+    "severe": 0.2,
+    "unknown": 0.5,
+}
+_SEVERE_INCIDENTS = frozenset(("major", "severe", "critical"))
+
+
 def extract_features(
     route: dict,
     current_traffic: dict,
     prediction_time: datetime,
+    out: Optional[np.ndarray] = None,
 ) -> np.ndarray:
     """
     Extract feature vector for ML prediction.
 
+    The schema is fixed (see get_feature_names), so every slot is written
+    directly instead of assembling per-group lists.
+
+    Args:
+        out: Optional preallocated buffer of NUM_FEATURES to fill in place,
+            e.g. a row of a batch matrix
+
     Returns:
         numpy array of features
     """
-    features = []
+    if out is None:
+        out = np.empty(NUM_FEATURES, dtype=FEATURE_DTYPE)
 
     # Temporal features
-    features.extend(extract_temporal_features(prediction_time))
+    out[0:9] = extract_temporal_features(prediction_time)
 
     # Current traffic features
-    features.extend(extract_traffic_features(current_traffic))
+    # Speed ratio (1.0 = free flow)
+    out[9] = current_traffic.get("avg_speed_ratio", 1.0)
+    out[10] = _TRAFFIC_LEVEL_VALUES.get(current_traffic.get("level", "unknown"), 0.5)
+
+    # Incident count, normalized to 0-1, and whether any is severe
+    incidents = current_traffic.get("incidents", [])
+    out[11] = min(len(incidents), 5) / 5
+    out[12] = 1.0 if any(i.get("severity", "") in _SEVERE_INCIDENTS for i in incidents) else 0.0
 
     # Route characteristics
-    features.extend(extract_route_features(route))
+    # Distance (normalized, assuming max 100km commute)
+    distance = route.get("distance_km", 0)
+    out[13] = min(distance / 100, 1.0)
 
-    return np.array(features)
+    # Base duration (normalized, assuming max 120 min)
+    duration = route.get("duration_minutes", 0)
+    out[14] = min(duration / 120, 1.0)
 
+    # Average speed (km/h, indicates highway vs local), normalized to highway speed
+    out[15] = min(distance / (duration / 60) / 120, 1.0) if duration > 0 else 0.5
 
-def extract_temporal_features(dt: datetime) -> list[float]:
-    """
-    Extract time-based features.
-    These are the strongest predictors of traffic patterns.
+    return out
+
+
+def extract_features_batch(
+    routes: list[dict],
+    traffic: list[dict],
+    times: list[datetime],
+) -> np.ndarray:
     """
-    features = []
+    Vectorized extract_features for many rows, e.g. training history.
 
-    # Hour of day (cyclical encoding)
-    hour = dt.hour + dt.minute / 60
-    features.append(np.sin(2 * np.pi * hour / 24))
-    features.append(np.cos(2 * np.pi * hour / 24))
+    Inputs are pulled into column arrays once and every feature is computed
+    across all rows with array ops. Must stay in sync with extract_features.
 
-    # Day of week (cyclical encoding)
-    dow = dt.weekday()
-    features.append(np.sin(2 * np.pi * dow / 7))
-    features.append(np.cos(2 * np.pi * dow / 7))
+    Returns:
+        (n_rows, NUM_FEATURES) numpy array of features
+    """
+    n = len(routes)
+    out = np.empty((n, NUM_FEATURES), dtype=FEATURE_DTYPE)
+    if n == 0:
+        return out
+
+    # Gather columns
+    hour = np.fromiter((t.hour for t in times), dtype=np.intp, count=n)
+    minute = np.fromiter((t.minute for t in times), dtype=np.float64, count=n)
+    dow = np.fromiter((t.weekday() for t in times), dtype=np.intp, count=n)
+    month = np.fromiter((t.month for t in times), dtype=np.float64, count=n)
+
+    speed_ratio = np.fromiter((t.get("avg_speed_ratio", 1.0) for t in traffic), dtype=np.float64, count=n)
+    level = np.fromiter(
+        (_TRAFFIC_LEVEL_VALUES.get(t.get("level", "unknown"), 0.5) for t in traffic),
+        dtype=np.float64, count=n,
+    )
+    incident_count = np.fromiter((len(t.get("incidents", [])) for t in traffic), dtype=np.float64, count=n)
+    has_severe = np.fromiter(
+        (any(i.get("severity", "") in _SEVERE_INCIDENTS for i in t.get("incidents", [])) for t in traffic),
+        dtype=np.float64, count=n,
+    )
 
-    # Is weekend
-    features.append(1.0 if dow >= 5 else 0.0)
+    distance = np.fromiter((r.get("distance_km", 0) for r in routes), dtype=np.float64, count=n)
+    duration = np.fromiter((r.get("duration_minutes", 0) for r in routes), dtype=np.float64, count=n)
 
-    # Rush hour indicators
-    is_morning_rush = 1.0 if 7 <= dt.hour <= 9 else 0.0
-    is_evening_rush = 1.0 if 16 <= dt.hour <= 19 else 0.0
-    features.append(is_morning_rush)
-    features.append(is_evening_rush)
+    # Temporal features
+    hour_frac = hour + minute / 60
+    out[:, 0] = np.sin(2 * np.pi * hour_frac / 24)
+    out[:, 1] = np.cos(2 * np.pi * hour_frac / 24)
+    out[:, 2] = np.sin(2 * np.pi * dow / 7)
+    out[:, 3] = np.cos(2 * np.pi * dow / 7)
+    out[:, 4] = np.frombuffer(_WEEKEND_LUT, dtype=np.uint8)[dow]
+    rush = np.frombuffer(_HOUR_RUSH_LUT, dtype=np.uint8)[hour]
+    out[:, 5] = rush >> 1
+    out[:, 6] = rush & 1
+    out[:, 7] = np.sin(2 * np.pi * month / 12)
+    out[:, 8] = np.cos(2 * np.pi * month / 12)
 
-    # Month (for seasonal patterns)
-    month = dt.month
-    features.append(np.sin(2 * np.pi * month / 12))
-    features.append(np.cos(2 * np.pi * month / 12))
+    # Current traffic features
+    out[:, 9] = speed_ratio
+    out[:, 10] = level
+    out[:, 11] = np.minimum(incident_count, 5) / 5
+    out[:, 12] = has_severe
 
-    return features
+    # Route characteristics
+    out[:, 13] = np.minimum(distance / 100, 1.0)
+    out[:, 14] = np.minimum(duration / 120, 1.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_speed = distance / (duration / 60)
+    out[:, 15] = np.where(duration > 0, np.minimum(avg_speed / 120, 1.0), 0.5)
 
+    return out
 
-def extract_traffic_features(traffic: dict) -> list[float]:
-    """Extract features from current traffic conditions."""
-    features = []
 
-    # Speed ratio (1.0 = free flow)
-    speed_ratio = traffic.get("avg_speed_ratio", 1.0)
-    features.append(speed_ratio)
-
-    # Traffic level as numeric
-    level_map = {
-        "free": 1.0,
-        "light": 0.8,
-        "moderate": 0.6,
-        "heavy": 0.4,
-        "severe": 0.2,
-        "unknown": 0.5,
-    }
-    level = traffic.get("level", "unknown")
-    features.append(level_map.get(level, 0.5))
-
-    # Incident count
-    incidents = traffic.get("incidents", [])
-    features.append(min(len(incidents), 5) / 5)  # Normalize to 0-1
-
-    # Has severe incident
-    has_severe = any(
-        i.get("severity", "") in ["major", "severe", "critical"]
-        for i in incidents
-    )
-    features.append(1.0 if has_severe else 0.0)
+def extract_temporal_features(dt: datetime) -> tuple[float, ...]:
+    """
+    Extract time-based features.
+    These are the strongest predictors of traffic patterns.
 
-    return features
+    Features only change once per minute, so the work is memoized on the
+    minute-resolution fields that actually feed the encoding.
+    """
+    return _temporal_features_cached(dt.hour, dt.minute, dt.weekday(), dt.month)
 
 
-def extract_route_features(route: dict) -> list[float]:
-    """Extract features from route characteristics."""
+@lru_cache(maxsize=4096)
+def _temporal_features_cached(
+    hour: int, minute: int, dow: int, month: int
+) -> tuple[float, ...]:
     features = []
 
-    # Distance (normalized, assuming max 100km commute)
-    distance = route.get("distance_km", 0)
-    features.append(min(distance / 100, 1.0))
+    # Hour of day (cyclical encoding)
+    hour_frac = hour + minute / 60
+    features.append(float(np.sin(2 * np.pi * hour_frac / 24)))
+    features.append(float(np.cos(2 * np.pi * hour_frac / 24)))
 
-    # Base duration (normalized, assuming max 120 min)
-    duration = route.get("duration_minutes", 0)
-    features.append(min(duration / 120, 1.0))
+    # Day of week (cyclical encoding)
+    features.append(float(np.sin(2 * np.pi * dow / 7)))
+    features.append(float(np.cos(2 * np.pi * dow / 7)))
 
-    # Average speed (km/h, indicates highway vs local)
-    if duration > 0:
-        avg_speed = distance / (duration / 60)
-        features.append(min(avg_speed / 120, 1.0))  # Normalize to highway speed
-    else:
-        features.append(0.5)
+    # Is weekend
+    features.append(float(_WEEKEND_LUT[dow]))
+
+    # Rush hour indicators
+    rush = _HOUR_RUSH_LUT[hour]
+    is_morning_rush = float(rush >> 1)
+    is_evening_rush = float(rush & 1)
+    features.append(is_morning_rush)
+    features.append(is_evening_rush)
+
+    # Month (for seasonal patterns)
+    features.append(float(np.sin(2 * np.pi * month / 12)))
+    features.append(float(np.cos(2 * np.pi * month / 12)))
 
-    return features
+    return tuple(features)
 
 
 def get_feature_names() -> list[str]:
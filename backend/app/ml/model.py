@@ -1,14 +1,77 @@
 """
 Traffic prediction model.
 
-Uses Gradient Boosting for robust predictions.
+Uses histogram-based Gradient Boosting for robust predictions with
+compiled (Cython) inference.
 Could be swapped for LSTM/Transformer for sequence modeling.
 """
 import numpy as np
-from sklearn.ensemble import GradientBoostingRegressor
-from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.inspection import permutation_importance
 from typing import Optional
 
+from app.ml.features import FEATURE_DTYPE
+
+
+# Bump when the model layout changes so stale persisted models are discarded
+MODEL_VERSION = 2
+
+# Permutation importance rescores the model n_repeats times per feature;
+# a capped subsample keeps that cost flat as history grows
+IMPORTANCE_MAX_SAMPLES = 1000
+IMPORTANCE_REPEATS = 5
+
+
+class _FlatForest:
+    """
+    All boosted trees flattened into contiguous node arrays.
+
+    sklearn's predict spends ~1ms on validation and thread dispatch for a
+    single row, which dwarfs the actual traversal of 100 shallow trees.
+    Walking every tree one level at a time with NumPy gathers gives the
+    same result in a fraction of the time.
+    """
+
+    def __init__(self, model: HistGradientBoostingRegressor):
+        nodes_per_tree = [predictors[0].nodes for predictors in model._predictors]
+        nodes = np.concatenate(nodes_per_tree)
+        if nodes["is_categorical"].any():
+            raise ValueError("categorical splits are not supported")
+
+        sizes = [len(n) for n in nodes_per_tree]
+        offsets = np.repeat(np.cumsum([0] + sizes[:-1]), sizes)
+
+        self.feature = nodes["feature_idx"].astype(np.intp)
+        self.threshold = nodes["num_threshold"].astype(np.float64)
+        self.missing_left = nodes["missing_go_to_left"].astype(bool)
+        self.left = nodes["left"].astype(np.intp) + offsets
+        self.right = nodes["right"].astype(np.intp) + offsets
+        self.value = nodes["value"].astype(np.float64)
+
+        # Leaves point at themselves so every tree can step a fixed depth
+        leaves = np.flatnonzero(nodes["is_leaf"])
+        self.left[leaves] = leaves
+        self.right[leaves] = leaves
+
+        self.roots = np.cumsum([0] + sizes[:-1]).astype(np.intp)
+        self.depth = int(nodes["depth"].max())
+        self.baseline = float(np.ravel(model._baseline_prediction)[0])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Raw predictions for a (n_samples, n_features) matrix.
+
+        Inputs are used as-is (no validation or dtype copy); float32 values
+        promote exactly when compared against the float64 thresholds.
+        """
+        X = np.asarray(X)
+        idx = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            x = np.take_along_axis(X, self.feature[idx], axis=1)
+            go_left = np.where(np.isnan(x), self.missing_left[idx], x <= self.threshold[idx])
+            idx = np.where(go_left, self.left[idx], self.right[idx])
+        return self.baseline + self.value[idx].sum(axis=1)
+
 
 class TrafficModel:
     """
@@ -16,20 +79,23 @@ class TrafficModel:
 
     Predicts a multiplier to apply to base route duration.
     E.g., 1.2 means trip will take 20% longer than base estimate.
+
+    Tree splits are scale-invariant, so features are fed to the model
+    unscaled.
     """
 
     def __init__(self):
-        self.model = GradientBoostingRegressor(
-            n_estimators=100,
+        self.version = MODEL_VERSION
+        self.model = HistGradientBoostingRegressor(
+            max_iter=100,
             max_depth=5,
             learning_rate=0.1,
-            min_samples_split=5,
             min_samples_leaf=3,
             random_state=42,
         )
-        self.scaler = StandardScaler()
         self.is_trained = False
         self._feature_importances: Optional[np.ndarray] = None
+        self._forest: Optional[_FlatForest] = None
 
     def fit(self, X: np.ndarray, y: np.ndarray):
         """
@@ -42,13 +108,27 @@ class TrafficModel:
         if len(X) < 10:
             return  # Need minimum data
 
-        # Scale features
-        X_scaled = self.scaler.fit_transform(X)
+        # Train on the same precision used at inference time
+        X = np.asarray(X, dtype=FEATURE_DTYPE)
 
         # Fit model
-        self.model.fit(X_scaled, y)
+        self.model.fit(X, y)
         self.is_trained = True
-        self._feature_importances = self.model.feature_importances_
+
+        # Fast inference path; relies on sklearn internals, so optional
+        try:
+            self._forest = _FlatForest(self.model)
+        except Exception:
+            self._forest = None
+
+        # HistGradientBoosting has no impurity-based importances
+        importance = permutation_importance(
+            self.model, X, y,
+            n_repeats=IMPORTANCE_REPEATS,
+            max_samples=min(len(X), IMPORTANCE_MAX_SAMPLES),
+            random_state=42,
+        )
+        self._feature_importances = importance.importances_mean
 
     def predict(self, features: np.ndarray) -> float:
         """
@@ -63,16 +143,38 @@ class TrafficModel:
         if not self.is_trained:
             return 1.0  # No prediction without training
 
-        # Reshape and scale
-        X = features.reshape(1, -1)
-        X_scaled = self.scaler.transform(X)
+        # Reshape to a single-row matrix
+        X = features.reshape(1, -1).astype(FEATURE_DTYPE, copy=False)
 
         # Predict
-        prediction = self.model.predict(X_scaled)[0]
+        prediction = self._predict_raw(X)[0]
 
         # Clamp to reasonable range
         return float(np.clip(prediction, 0.5, 3.0))
 
+    def predict_batch(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict duration multipliers for many feature vectors at once.
+
+        Args:
+            X: Feature matrix (n_samples, n_features)
+
+        Returns:
+            Array of duration multipliers, one per row
+        """
+        if not self.is_trained:
+            return np.ones(len(X))
+
+        X = np.asarray(X, dtype=FEATURE_DTYPE)
+        return np.clip(self._predict_raw(X), 0.5, 3.0)
+
+    def _predict_raw(self, X: np.ndarray) -> np.ndarray:
+        """Unclamped predictions, via the flattened trees when available."""
+        forest = getattr(self, "_forest", None)  # absent on older pickles
+        if forest is not None:
+            return forest.predict(X)
+        return self.model.predict(X)
+
     def get_feature_importance(self) -> dict[str, float]:
         """Get feature importance for interpretability."""
         if self._feature_importances is None:
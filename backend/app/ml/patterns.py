@@ -2,10 +2,66 @@
 Pattern analysis for commute history.
 Identifies best times, worst days, and recurring patterns.
 """
+from dataclasses import dataclass
 from datetime import datetime
-from collections import defaultdict
 from typing import Optional
 
+import numpy as np
+
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+@dataclass
+class HistoryColumns:
+    """Completed trips as parallel arrays (one element per trip)."""
+    durations: np.ndarray  # minutes
+    weekday: np.ndarray  # 0=Monday
+    hour: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+
+def history_to_columns(history: list) -> HistoryColumns:
+    """
+    Read completed history entries into column arrays in a single pass.
+    Entries without a recorded duration are skipped.
+    """
+    completed = [entry for entry in history if entry.duration_minutes]
+    started = [
+        datetime.fromisoformat(e.started_at.replace("Z", "+00:00"))
+        if isinstance(e.started_at, str) else e.started_at
+        for e in completed
+    ]
+
+    n = len(completed)
+    return HistoryColumns(
+        durations=np.fromiter((e.duration_minutes for e in completed), dtype=np.float64, count=n),
+        weekday=np.fromiter((s.weekday() for s in started), dtype=np.int8, count=n),
+        hour=np.fromiter((s.hour for s in started), dtype=np.int8, count=n),
+    )
+
+
+def _bucket_stats(keys: np.ndarray, values: np.ndarray, n_buckets: int) -> tuple[np.ndarray, ...]:
+    """
+    Running sum/count/min/max per bucket, accumulated in one pass.
+
+    Aggregates live in fixed-size arrays (7 days, 24 hours), so memory is
+    O(buckets) regardless of history length. Empty buckets have count 0 and
+    NaN statistics.
+    Returns (counts, avgs, mins, maxs), each of length n_buckets.
+    """
+    sums = np.bincount(keys, weights=values, minlength=n_buckets)
+    counts = np.bincount(keys, minlength=n_buckets)
+    mins = np.full(n_buckets, np.inf)
+    maxs = np.full(n_buckets, -np.inf)
+    np.minimum.at(mins, keys, values)
+    np.maximum.at(maxs, keys, values)
+
+    avgs = np.divide(sums, counts, out=np.full(n_buckets, np.nan), where=counts > 0)
+    return counts, avgs, mins, maxs
+
 
 def analyze_commute_patterns(history: list) -> dict:
     """
@@ -20,57 +76,37 @@ def analyze_commute_patterns(history: list) -> dict:
     if not history:
         return {"message": "No data available", "trips_recorded": 0}
 
-    # Group by various dimensions
-    by_day = defaultdict(list)
-    by_hour = defaultdict(list)
-    by_day_hour = defaultdict(list)
-
-    for entry in history:
-        if not entry.duration_minutes:
-            continue
-
-        started = entry.started_at
-        if isinstance(started, str):
-            started = datetime.fromisoformat(started.replace("Z", "+00:00"))
-
-        dow = started.weekday()  # 0=Monday
-        hour = started.hour
+    columns = history_to_columns(history)
+    if not len(columns):
+        return {"message": "No data available", "trips_recorded": 0}
 
-        by_day[dow].append(entry.duration_minutes)
-        by_hour[hour].append(entry.duration_minutes)
-        by_day_hour[(dow, hour)].append(entry.duration_minutes)
+    durations = columns.durations
 
     # Calculate statistics
-    day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-
+    day_counts, day_avgs, day_mins, day_maxs = _bucket_stats(columns.weekday, durations, 7)
     day_stats = {}
-    for dow, durations in by_day.items():
-        day_stats[day_names[dow]] = {
-            "avg_minutes": round(sum(durations) / len(durations), 1),
-            "min_minutes": round(min(durations), 1),
-            "max_minutes": round(max(durations), 1),
-            "trips": len(durations),
+    for d in np.flatnonzero(day_counts):
+        day_stats[DAY_NAMES[d]] = {
+            "avg_minutes": round(float(day_avgs[d]), 1),
+            "min_minutes": round(float(day_mins[d]), 1),
+            "max_minutes": round(float(day_maxs[d]), 1),
+            "trips": int(day_counts[d]),
         }
 
+    hour_counts, hour_avgs, _, _ = _bucket_stats(columns.hour, durations, 24)
     hour_stats = {}
-    for hour, durations in by_hour.items():
-        hour_stats[f"{hour:02d}:00"] = {
-            "avg_minutes": round(sum(durations) / len(durations), 1),
-            "trips": len(durations),
+    for h in np.flatnonzero(hour_counts):
+        hour_stats[f"{h:02d}:00"] = {
+            "avg_minutes": round(float(hour_avgs[h]), 1),
+            "trips": int(hour_counts[h]),
         }
 
-    # Find best and worst
-    all_durations = [
-        entry.duration_minutes
-        for entry in history
-        if entry.duration_minutes
-    ]
-
-    best_day = min(day_stats.items(), key=lambda x: x[1]["avg_minutes"])[0] if day_stats else None
-    worst_day = max(day_stats.items(), key=lambda x: x[1]["avg_minutes"])[0] if day_stats else None
+    # Empty buckets are NaN, so nanarg* only considers days/hours with trips
+    best_day = DAY_NAMES[int(np.nanargmin(day_avgs))]
+    worst_day = DAY_NAMES[int(np.nanargmax(day_avgs))]
 
-    best_hour = min(hour_stats.items(), key=lambda x: x[1]["avg_minutes"])[0] if hour_stats else None
-    worst_hour = max(hour_stats.items(), key=lambda x: x[1]["avg_minutes"])[0] if hour_stats else None
+    best_hour = f"{int(np.nanargmin(hour_avgs)):02d}:00"
+    worst_hour = f"{int(np.nanargmax(hour_avgs)):02d}:00"
 
     # Calculate recommendations
     recommendations = generate_recommendations(
@@ -83,11 +119,11 @@ def analyze_commute_patterns(history: list) -> dict:
     )
 
     return {
-        "trips_recorded": len(all_durations),
+        "trips_recorded": len(columns),
         "overall": {
-            "avg_minutes": round(sum(all_durations) / len(all_durations), 1),
-            "best_minutes": round(min(all_durations), 1),
-            "worst_minutes": round(max(all_durations), 1),
+            "avg_minutes": round(float(durations.mean()), 1),
+            "best_minutes": round(float(durations.min()), 1),
+            "worst_minutes": round(float(durations.max()), 1),
         },
         "by_day": day_stats,
         "by_hour": dict(sorted(hour_stats.items())),
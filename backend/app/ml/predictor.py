@@ -10,8 +10,8 @@ from typing import Optional
 from pathlib import Path
 import joblib
 
-from app.ml.features import extract_features
-from app.ml.model import TrafficModel
+from app.ml.features import extract_features, extract_features_batch, NUM_FEATURES, FEATURE_DTYPE
+from app.ml.model import TrafficModel, MODEL_VERSION
 
 
 MODEL_PATH = Path(__file__).parent / "trained_model.joblib"
@@ -38,11 +38,19 @@ class TrafficPredictor:
         """Load trained model or create new one."""
         if MODEL_PATH.exists():
             try:
-                return joblib.load(MODEL_PATH)
+                model = joblib.load(MODEL_PATH)
+                # Ignore models persisted by an older layout
+                if getattr(model, "version", None) == MODEL_VERSION:
+                    return model
             except Exception:
                 pass
         return TrafficModel()
 
+    def warm_up(self):
+        """Exercise the inference path once so arrays are paged in at startup."""
+        if self.model.is_trained:
+            self.model.predict_batch(np.zeros((1, NUM_FEATURES), dtype=FEATURE_DTYPE))
+
     def predict_duration(
         self,
         route: dict,
@@ -62,6 +70,10 @@ class TrafficPredictor:
         """
         base_duration = route.get("duration_minutes", 0)
 
+        # Untrained model has nothing to add; skip feature extraction
+        if not self.model.is_trained:
+            return round(base_duration * self._estimate_multiplier(current_traffic), 1)
+
         # Extract features for prediction
         features = extract_features(
             route=route,
@@ -79,6 +91,50 @@ class TrafficPredictor:
         predicted_duration = base_duration * traffic_multiplier
         return round(predicted_duration, 1)
 
+    def predict_duration_batch(
+        self,
+        routes: list[dict],
+        current_traffic: list[dict],
+        horizon_minutes: int = 30,
+    ) -> list[float]:
+        """
+        Predict durations for several routes with a single model call.
+
+        Args:
+            routes: Route dicts with geometry, base duration
+            current_traffic: Current traffic conditions, aligned with routes
+            horizon_minutes: How far ahead to predict
+
+        Returns:
+            Predicted durations in minutes, aligned with routes
+        """
+        base_durations = np.array([r.get("duration_minutes", 0) for r in routes], dtype=float)
+
+        # Untrained model has nothing to add; skip feature extraction
+        if not self.model.is_trained:
+            multipliers = np.array([self._estimate_multiplier(t) for t in current_traffic])
+            return [round(float(d), 1) for d in base_durations * multipliers]
+
+        prediction_time = datetime.now() + timedelta(minutes=horizon_minutes // 2)
+
+        X = np.empty((len(routes), NUM_FEATURES), dtype=FEATURE_DTYPE)
+        for i, (route, traffic) in enumerate(zip(routes, current_traffic)):
+            extract_features(
+                route=route,
+                current_traffic=traffic,
+                prediction_time=prediction_time,
+                out=X[i],
+            )
+
+        # Get predictions from model
+        try:
+            multipliers = self.model.predict_batch(X)
+        except Exception:
+            # Fall back to simple estimation
+            multipliers = np.array([self._estimate_multiplier(t) for t in current_traffic])
+
+        return [round(float(d), 1) for d in base_durations * multipliers]
+
     def _estimate_multiplier(self, current_traffic: dict) -> float:
         """
         Simple fallback estimation when ML model not trained.
@@ -114,6 +170,11 @@ class TrafficPredictor:
         Get confidence in prediction for this route.
         Higher confidence with more historical data.
         """
+        # Lower confidence for heuristic-only; not cached so routes pick up
+        # the trained confidence once a model exists
+        if not self.model.is_trained:
+            return 0.4
+
         route_id = route.get("id", "")
 
         # Check if we have historical data for this route
@@ -121,10 +182,7 @@ class TrafficPredictor:
             return self._confidence_cache[route_id]
 
         # Base confidence on model training status
-        if self.model.is_trained:
-            base_confidence = 0.7
-        else:
-            base_confidence = 0.4  # Lower confidence for heuristic-only
+        base_confidence = 0.7
 
         # Would increase with more historical data for this specific route
         self._confidence_cache[route_id] = base_confidence
@@ -148,25 +206,19 @@ class TrafficPredictor:
     def _prepare_training_data(
         self, history: list[dict]
     ) -> tuple[np.ndarray, np.ndarray]:
-        """Prepare training data from history."""
-        features_list = []
-        targets = []
-
-        for entry in history:
-            if not entry.get("duration_minutes"):
-                continue
-
-            # Extract features from historical entry
-            features = extract_features(
-                route=entry.get("route", {}),
-                current_traffic=entry.get("traffic_conditions", {}),
-                prediction_time=datetime.fromisoformat(entry.get("started_at", "")),
-            )
-            features_list.append(features)
+        """Prepare training data from history as column-wise feature matrix."""
+        completed = [entry for entry in history if entry.get("duration_minutes")]
+
+        routes = [entry.get("route") or {} for entry in completed]
+        X = extract_features_batch(
+            routes=routes,
+            traffic=[entry.get("traffic_conditions") or {} for entry in completed],
+            times=[datetime.fromisoformat(entry.get("started_at", "")) for entry in completed],
+        )
 
-            # Target: actual duration / expected duration
-            expected = entry.get("route", {}).get("duration_minutes", 1)
-            actual = entry["duration_minutes"]
-            targets.append(actual / max(expected, 1))
+        # Target: actual duration / expected duration
+        expected = np.fromiter((r.get("duration_minutes", 1) for r in routes), dtype=np.float64, count=len(routes))
+        actual = np.fromiter((e["duration_minutes"] for e in completed), dtype=np.float64, count=len(completed))
+        y = actual / np.maximum(expected, 1)
 
-        return np.array(features_list), np.array(targets)
+        return X, y
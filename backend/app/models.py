@@ -34,6 +34,11 @@ class CommuteHistory(BaseModel):
     switched_routes: bool = False
 
 
+# Internal geometry point: (lat, lng). Much lighter than a model instance;
+# converted to Coordinate only when building API responses.
+CoordTuple = tuple[float, float]
+
+
 class Coordinate(BaseModel):
     lat: float
     lng: float
@@ -0,0 +1,57 @@
+"""
+Process-wide HTTP client shared by the services that call external APIs.
+One connection pool means keep-alive and TLS sessions are reused across
+requests instead of each service instance holding its own.
+
+Both clients advertise every content encoding they can decode, so with the
+brotli/zstd extras installed providers can send br or zstd instead of gzip.
+"""
+import aiohttp
+import httpx
+from typing import Optional
+
+
+_client: Optional[httpx.AsyncClient] = None
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use."""
+    global _client
+    # No await between check and assignment, so this is safe on one event loop
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=200,
+                max_keepalive_connections=50,
+                keepalive_expiry=60.0,
+            ),
+            http2=True,
+        )
+    return _client
+
+
+def get_aiohttp_session() -> aiohttp.ClientSession:
+    """
+    Return the shared aiohttp session, creating it on first use.
+    Used for plain keyless GETs where only the raw body is needed.
+    """
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=200, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=30.0, connect=5.0),
+        )
+    return _session
+
+
+async def close_http_client():
+    """Close the shared connection pools (called on app shutdown)."""
+    global _client, _session
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _session is not None:
+        await _session.close()
+        _session = None
@@ -3,12 +3,141 @@ Routing service - gets route options from external APIs.
 Uses HERE or TomTom as primary, falls back to OSRM for free tier.
 Includes turn-by-turn instructions for navigation.
 """
+import asyncio
+import logging
+import time
+import aiohttp
 import httpx
-from typing import Optional
+import orjson
+from typing import Final, Optional
 import polyline
-import flexpolyline
 
 from app.config import get_settings
+from app.models import CoordTuple
+from app.services.http_client import get_aiohttp_session, get_http_client
+from app.services.polyline_codec import decode_flexpolyline, decode_polyline
+
+
+log = logging.getLogger(__name__)
+
+ROUTE_CACHE_MAX_ENTRIES = 1024
+
+# Incident provider circuit breaker: after this many consecutive failures a
+# provider is skipped until the cooldown passes, then retried once
+PROVIDER_FAILURE_THRESHOLD = 3
+PROVIDER_COOLDOWN_SECONDS = 60.0
+
+# Origin/destination closer than this on both axes (~10m) is no corridor
+MIN_INCIDENT_SPAN_DEG = 1e-4
+
+# Provider vocabularies, mapped once at import rather than per instruction
+_TOMTOM_ICON_TYPE: Final[dict[int, str]] = {
+    0: "unknown",
+    1: "accident",
+    2: "fog",
+    3: "dangerous_conditions",
+    4: "rain",
+    5: "ice",
+    6: "jam",
+    7: "lane_closed",
+    8: "road_closed",
+    9: "road_works",
+    10: "wind",
+    11: "flooding",
+    14: "broken_down_vehicle",
+}
+
+# HERE v7 incident enums, lower-cased for our API; unknown values fall back to .lower()
+_HERE_INCIDENT_TYPE: Final[dict[str, str]] = {
+    name: name.lower()
+    for name in (
+        "accident", "congestion", "construction", "disabledVehicle", "massTransit",
+        "plannedEvent", "roadHazard", "roadClosure", "weather", "laneRestriction", "other",
+    )
+}
+_HERE_SEVERITY: Final[dict[str, str]] = {
+    name: name.lower() for name in ("critical", "major", "minor", "lowImpact")
+}
+
+# Indexed by TomTom magnitudeOfDelay (0-4)
+_DELAY_SEVERITY: Final[tuple[str, ...]] = ("low", "minor", "moderate", "major", "critical")
+
+_HERE_MANEUVER: Final[dict[str, str]] = {
+    "depart": "depart",
+    "arrive": "arrive",
+    "turn": "turn",
+    "continue": "straight",
+    "roundaboutEnter": "roundabout",
+    "roundaboutExit": "roundabout-exit",
+    "ramp": "ramp",
+    "merge": "merge",
+    "fork": "fork",
+    "uTurn": "uturn",
+}
+
+# Ordered substring rules for TomTom maneuver names; first match wins
+_TOMTOM_MANEUVER_RULES: Final[tuple[tuple[tuple[str, ...], str], ...]] = (
+    (("LEFT",), "turn-left"),
+    (("RIGHT",), "turn-right"),
+    (("STRAIGHT",), "straight"),
+    (("UTURN",), "uturn"),
+    (("ROUNDABOUT",), "roundabout"),
+    (("RAMP", "MOTORWAY"), "ramp"),
+    (("MERGE",), "merge"),
+    (("ARRIVE",), "arrive"),
+    (("DEPART",), "depart"),
+)
+
+# TomTom Routing API guidance maneuver codes
+_TOMTOM_MANEUVERS: Final[tuple[str, ...]] = (
+    "ARRIVE", "ARRIVE_LEFT", "ARRIVE_RIGHT", "DEPART", "STRAIGHT",
+    "KEEP_RIGHT", "BEAR_RIGHT", "TURN_RIGHT", "SHARP_RIGHT",
+    "KEEP_LEFT", "BEAR_LEFT", "TURN_LEFT", "SHARP_LEFT",
+    "MAKE_UTURN", "TRY_MAKE_UTURN", "ENTER_MOTORWAY", "ENTER_FREEWAY",
+    "ENTER_HIGHWAY", "ENTRANCE_RAMP", "TAKE_EXIT", "MOTORWAY_EXIT_LEFT",
+    "MOTORWAY_EXIT_RIGHT", "TAKE_FERRY", "ROUNDABOUT_CROSS", "ROUNDABOUT_RIGHT",
+    "ROUNDABOUT_LEFT", "ROUNDABOUT_BACK", "FOLLOW", "SWITCH_PARALLEL_ROAD",
+    "SWITCH_MAIN_ROAD", "WAYPOINT_LEFT", "WAYPOINT_RIGHT", "WAYPOINT_REACHED",
+)
+
+
+def _classify_tomtom_maneuver(maneuver: str) -> str:
+    """Apply the TomTom substring rules to an upper-cased maneuver name."""
+    for needles, result in _TOMTOM_MANEUVER_RULES:
+        if any(needle in maneuver for needle in needles):
+            return result
+    return "straight"
+
+
+_TOMTOM_MANEUVER: Final[dict[str, str]] = {
+    name: _classify_tomtom_maneuver(name) for name in _TOMTOM_MANEUVERS
+}
+
+# OSRM step templates; {road} is " onto <name>" when the step has a road name
+_OSRM_TEMPLATES: Final[dict[str, str]] = {
+    "depart": "Start{road}",
+    "arrive": "You have arrived at your destination",
+    "turn": "Turn {modifier}{road}",
+    "merge": "Merge {modifier}{road}",
+    "ramp": "Take the ramp {modifier}{road}",
+    "fork": "Keep {modifier} at the fork{road}",
+    "roundabout": "Enter the roundabout{road}",
+    "exit roundabout": "Exit the roundabout{road}",
+    "continue": "Continue{road}",
+    "new name": "Continue{road}",
+}
+
+_ROUTE_NAMES: Final[tuple[str, ...]] = ("Primary Route", "Via Highway", "Local Streets", "Scenic Route")
+
+_routing_service: Optional["RoutingService"] = None
+
+
+def get_routing_service() -> "RoutingService":
+    """Shared RoutingService, so its route cache spans all requests."""
+    global _routing_service
+    if _routing_service is None:
+        _routing_service = RoutingService()
+    return _routing_service
 
 
 class RoutingService:
@@ -16,12 +145,38 @@ class RoutingService:
 
     def __init__(self):
         self.settings = get_settings()
-        self._client: Optional[httpx.AsyncClient] = None
+        # key -> (fetched_at monotonic, routes)
+        self._cache: dict[tuple, tuple[float, list[dict]]] = {}
+        self._refresh_tasks: dict[tuple, asyncio.Task] = {}
+        # key -> upstream fetch shared by concurrent identical requests
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        # provider -> (consecutive failures, last failure monotonic)
+        self._provider_failures: dict[str, tuple[int, float]] = {}
 
     async def _get_client(self) -> httpx.AsyncClient:
-        if self._client is None:
-            self._client = httpx.AsyncClient(timeout=30.0)
-        return self._client
+        return get_http_client()
+
+    async def warm_connections(self):
+        """
+        Open pooled connections to the hosts the configured providers use,
+        so the first user request doesn't pay DNS + TCP + TLS setup.
+        """
+        client = await self._get_client()
+        urls = []
+        if self.settings.here_api_key:
+            urls += ["https://router.hereapi.com/", "https://data.traffic.hereapi.com/"]
+        if self.settings.tomtom_api_key:
+            urls.append("https://api.tomtom.com/")
+
+        warm = [client.head(url) for url in urls]
+        if not (self.settings.here_api_key or self.settings.tomtom_api_key):
+            warm.append(self._warm_osrm())
+        # Any response (even 404) leaves a connection in the pool
+        await asyncio.gather(*warm, return_exceptions=True)
+
+    async def _warm_osrm(self):
+        async with get_aiohttp_session().head("https://router.project-osrm.org/"):
+            pass
 
     async def get_routes(
         self,
@@ -32,18 +187,92 @@ class RoutingService:
     ) -> list[dict]:
         """
         Get route options between origin and destination.
-        Returns list of route dicts with geometry, distance, duration, and instructions.
+        Returns list of route dicts with geometry (list of (lat, lng) tuples),
+        distance, duration, and instructions.
+
+        Responses are cached for `route_cache_ttl_seconds`; the returned list
+        is shared with the cache and must not be mutated. For a further
+        `route_cache_stale_seconds` the stale entry is served while it is
+        refreshed in the background, and if the provider fails any cached
+        entry is served rather than an error. Concurrent misses for the same
+        key share a single upstream call.
         """
         # Try HERE first if key available
         if self.settings.here_api_key:
-            return await self._get_here_routes(origin, destination, alternatives, include_instructions)
-
+            provider, fetch = "here", self._get_here_routes
         # Fall back to TomTom
-        if self.settings.tomtom_api_key:
-            return await self._get_tomtom_routes(origin, destination, alternatives, include_instructions)
-
+        elif self.settings.tomtom_api_key:
+            provider, fetch = "tomtom", self._get_tomtom_routes
         # Last resort: OSRM (free, no traffic)
-        return await self._get_osrm_routes(origin, destination, alternatives, include_instructions)
+        else:
+            provider, fetch = "osrm", self._get_osrm_routes
+
+        # ~1m resolution so near-identical requests share an entry
+        key = (
+            provider,
+            round(origin[0], 5), round(origin[1], 5),
+            round(destination[0], 5), round(destination[1], 5),
+            alternatives,
+            include_instructions,
+        )
+        args = (origin, destination, alternatives, include_instructions)
+        cached = self._cache.get(key)
+        if cached:
+            age = time.monotonic() - cached[0]
+            if age < self.settings.route_cache_ttl_seconds:
+                return cached[1]
+            if age < self.settings.route_cache_ttl_seconds + self.settings.route_cache_stale_seconds:
+                if key not in self._refresh_tasks:
+                    task = asyncio.create_task(self._refresh_routes(key, fetch, args))
+                    self._refresh_tasks[key] = task
+                    task.add_done_callback(lambda _: self._refresh_tasks.pop(key, None))
+                return cached[1]
+
+        try:
+            return await self._fetch_routes(key, fetch, args)
+        except (httpx.HTTPError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if cached:
+                log.warning("Routing via %s failed, serving cached routes: %s", provider, e)
+                return cached[1]
+            raise
+
+    async def _fetch_routes(self, key: tuple, fetch, args: tuple) -> list[dict]:
+        """Fetch and cache routes, joining an identical fetch already in flight."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_store(key, fetch, args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish_inflight(key, t))
+        # Shielded so one caller disconnecting doesn't cancel the shared fetch
+        return await asyncio.shield(task)
+
+    def _finish_inflight(self, key: tuple, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the outcome so a fetch whose waiters were all cancelled
+        # doesn't log "Task exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch_and_store(self, key: tuple, fetch, args: tuple) -> list[dict]:
+        routes = await fetch(*args)
+        self._store_routes(key, routes)
+        return routes
+
+    async def _refresh_routes(self, key: tuple, fetch, args: tuple):
+        """Background revalidation of a stale cache entry."""
+        try:
+            await self._fetch_routes(key, fetch, args)
+        except Exception as e:
+            log.warning("Error refreshing cached routes", exc_info=e)
+
+    def _store_routes(self, key: tuple, routes: list[dict]):
+        """Cache a routing response, evicting the oldest quarter when full."""
+        self._cache[key] = (time.monotonic(), routes)
+        if len(self._cache) > ROUTE_CACHE_MAX_ENTRIES:
+            by_age = sorted(self._cache, key=lambda k: self._cache[k][0])
+            for k in by_age[: len(by_age) // 4]:
+                del self._cache[k]
 
     async def get_incidents(
         self,
@@ -51,151 +280,155 @@ class RoutingService:
         destination: tuple[float, float],
     ) -> list[dict]:
         """Get traffic incidents along the route corridor."""
-        # Calculate bounding box with some padding
-        min_lat = min(origin[0], destination[0]) - 0.1
-        max_lat = max(origin[0], destination[0]) + 0.1
-        min_lng = min(origin[1], destination[1]) - 0.1
-        max_lng = max(origin[1], destination[1]) + 0.1
+        lat0, lat1 = (origin[0], destination[0]) if origin[0] < destination[0] else (destination[0], origin[0])
+        lng0, lng1 = (origin[1], destination[1]) if origin[1] < destination[1] else (destination[1], origin[1])
 
-        incidents = []
+        # Both ends at the same spot: no route to report incidents on. Checked
+        # per axis, since a due north-south or east-west route has zero area
+        if lat1 - lat0 < MIN_INCIDENT_SPAN_DEG and lng1 - lng0 < MIN_INCIDENT_SPAN_DEG:
+            return []
+
+        # Calculate bounding box with some padding
+        min_lat, max_lat = lat0 - 0.1, lat1 + 0.1
+        min_lng, max_lng = lng0 - 0.1, lng1 + 0.1
 
-        # Try TomTom incidents
+        # Query every configured provider whose circuit is closed, concurrently
+        providers = []
         if self.settings.tomtom_api_key:
-            incidents.extend(await self._get_tomtom_incidents(min_lat, min_lng, max_lat, max_lng))
+            providers.append(("tomtom", self._get_tomtom_incidents))
+        if self.settings.here_api_key:
+            providers.append(("here", self._get_here_incidents))
+        providers = [(name, fetch) for name, fetch in providers if not self._circuit_open(name)]
 
-        # Try HERE incidents
-        if self.settings.here_api_key and not incidents:
-            incidents.extend(await self._get_here_incidents(min_lat, min_lng, max_lat, max_lng))
+        results = await asyncio.gather(
+            *(fetch(min_lat, min_lng, max_lat, max_lng) for _, fetch in providers),
+            return_exceptions=True,
+        )
+
+        # Merge, dropping incidents both providers report at the same spot
+        incidents = []
+        seen = set()
+        for (name, _), result in zip(providers, results):
+            if isinstance(result, Exception):
+                self._record_provider_failure(name)
+                log.warning("Error fetching %s incidents", name, exc_info=result)
+                continue
+            self._provider_failures.pop(name, None)
+            for incident in result:
+                key = (round(incident["lat"], 4), round(incident["lng"], 4), incident["type"])
+                if key not in seen:
+                    seen.add(key)
+                    incidents.append(incident)
 
         return incidents
 
+    def _circuit_open(self, provider: str) -> bool:
+        """True while a repeatedly failing provider is cooling down."""
+        failures = self._provider_failures.get(provider)
+        if failures is None or failures[0] < PROVIDER_FAILURE_THRESHOLD:
+            return False
+        return time.monotonic() - failures[1] < PROVIDER_COOLDOWN_SECONDS
+
+    def _record_provider_failure(self, provider: str):
+        count = self._provider_failures.get(provider, (0, 0.0))[0] + 1
+        self._provider_failures[provider] = (count, time.monotonic())
+
     async def _get_tomtom_incidents(
         self, min_lat: float, min_lng: float, max_lat: float, max_lng: float
     ) -> list[dict]:
         """Fetch incidents from TomTom Traffic API."""
         client = await self._get_client()
-        try:
-            bbox = f"{min_lat},{min_lng},{max_lat},{max_lng}"
-            resp = await client.get(
-                f"https://api.tomtom.com/traffic/services/5/incidentDetails",
-                params={
-                    "key": self.settings.tomtom_api_key,
-                    "bbox": bbox,
-                    "fields": "{incidents{type,geometry{type,coordinates},properties{iconCategory,magnitudeOfDelay,events{description},startTime,endTime}}}",
-                    "language": "en-US",
-                },
-            )
-            resp.raise_for_status()
-            data = resp.json()
-
-            incidents = []
-            for inc in data.get("incidents", []):
-                props = inc.get("properties", {})
-                geom = inc.get("geometry", {})
-                coords = geom.get("coordinates", [])
-
-                # Get first coordinate for marker placement
-                if coords and isinstance(coords[0], list):
-                    lat, lng = coords[0][1], coords[0][0]
-                elif coords:
-                    lat, lng = coords[1], coords[0]
-                else:
-                    continue
-
-                events = props.get("events", [])
-                description = events[0].get("description", "Traffic incident") if events else "Traffic incident"
-
-                incidents.append({
-                    "id": f"tomtom_{len(incidents)}",
-                    "type": self._map_tomtom_incident_type(props.get("iconCategory", 0)),
-                    "severity": self._map_delay_to_severity(props.get("magnitudeOfDelay", 0)),
-                    "description": description,
-                    "lat": lat,
-                    "lng": lng,
-                    "source": "tomtom",
-                })
-
-            return incidents
-        except Exception as e:
-            print(f"Error fetching TomTom incidents: {e}")
-            return []
+        bbox = f"{min_lat},{min_lng},{max_lat},{max_lng}"
+        resp = await client.get(
+            f"https://api.tomtom.com/traffic/services/5/incidentDetails",
+            params={
+                "key": self.settings.tomtom_api_key,
+                "bbox": bbox,
+                # Only the fields read below; timestamps and geometry type are unused
+                "fields": "{incidents{geometry{coordinates},properties{iconCategory,magnitudeOfDelay,events{description}}}}",
+                "language": "en-US",
+            },
+        )
+        resp.raise_for_status()
+        data = orjson.loads(resp.content)
+
+        incidents = []
+        for inc in data.get("incidents", []):
+            props = inc.get("properties", {})
+            geom = inc.get("geometry", {})
+            coords = geom.get("coordinates", [])
+
+            # Get first coordinate for marker placement
+            if coords and isinstance(coords[0], list):
+                lat, lng = coords[0][1], coords[0][0]
+            elif coords:
+                lat, lng = coords[1], coords[0]
+            else:
+                continue
+
+            events = props.get("events", [])
+            description = events[0].get("description", "Traffic incident") if events else "Traffic incident"
+
+            incidents.append({
+                "id": f"tomtom_{len(incidents)}",
+                "type": self._map_tomtom_incident_type(props.get("iconCategory", 0)),
+                "severity": self._map_delay_to_severity(props.get("magnitudeOfDelay", 0)),
+                "description": description,
+                "lat": lat,
+                "lng": lng,
+                "source": "tomtom",
+            })
+
+        return incidents
 
     async def _get_here_incidents(
         self, min_lat: float, min_lng: float, max_lat: float, max_lng: float
     ) -> list[dict]:
         """Fetch incidents from HERE Traffic API."""
         client = await self._get_client()
-        try:
-            resp = await client.get(
-                "https://data.traffic.hereapi.com/v7/incidents",
-                params={
-                    "apiKey": self.settings.here_api_key,
-                    "in": f"bbox:{min_lng},{min_lat},{max_lng},{max_lat}",
-                    "locationReferencing": "shape",
-                },
-            )
-            resp.raise_for_status()
-            data = resp.json()
-
-            incidents = []
-            for result in data.get("results", []):
-                inc = result.get("incidentDetails", {})
-                location = result.get("location", {})
-                shape = location.get("shape", {})
-                links = shape.get("links", [])
-
-                # Get coordinates from first link
-                if links and links[0].get("points"):
-                    point = links[0]["points"][0]
-                    lat, lng = point.get("lat", 0), point.get("lng", 0)
-                else:
-                    continue
-
-                incidents.append({
-                    "id": f"here_{len(incidents)}",
-                    "type": inc.get("type", "UNKNOWN").lower(),
-                    "severity": inc.get("criticality", "minor").lower(),
-                    "description": inc.get("description", {}).get("value", "Traffic incident"),
-                    "lat": lat,
-                    "lng": lng,
-                    "source": "here",
-                })
-
-            return incidents
-        except Exception as e:
-            print(f"Error fetching HERE incidents: {e}")
-            return []
+        resp = await client.get(
+            "https://data.traffic.hereapi.com/v7/incidents",
+            params={
+                "apiKey": self.settings.here_api_key,
+                "in": f"bbox:{min_lng},{min_lat},{max_lng},{max_lat}",
+                "locationReferencing": "shape",
+            },
+        )
+        resp.raise_for_status()
+        data = orjson.loads(resp.content)
+
+        incidents = []
+        for result in data.get("results", []):
+            # Marker goes at the first point of the first link; a
+            # single lookup chain is cheaper than probing each level
+            try:
+                point = result["location"]["shape"]["links"][0]["points"][0]
+            except (KeyError, IndexError, TypeError):
+                continue
+
+            inc = result.get("incidentDetails", {})
+            inc_type = inc.get("type", "UNKNOWN")
+            criticality = inc.get("criticality", "minor")
+
+            incidents.append({
+                "id": f"here_{len(incidents)}",
+                "type": _HERE_INCIDENT_TYPE.get(inc_type) or inc_type.lower(),
+                "severity": _HERE_SEVERITY.get(criticality) or criticality.lower(),
+                "description": inc.get("description", {}).get("value", "Traffic incident"),
+                "lat": point.get("lat", 0),
+                "lng": point.get("lng", 0),
+                "source": "here",
+            })
+
+        return incidents
 
     def _map_tomtom_incident_type(self, icon_category: int) -> str:
         """Map TomTom icon category to incident type."""
-        mapping = {
-            0: "unknown",
-            1: "accident",
-            2: "fog",
-            3: "dangerous_conditions",
-            4: "rain",
-            5: "ice",
-            6: "jam",
-            7: "lane_closed",
-            8: "road_closed",
-            9: "road_works",
-            10: "wind",
-            11: "flooding",
-            14: "broken_down_vehicle",
-        }
-        return mapping.get(icon_category, "unknown")
+        return _TOMTOM_ICON_TYPE.get(icon_category, "unknown")
 
     def _map_delay_to_severity(self, magnitude: int) -> str:
         """Map delay magnitude to severity level."""
-        if magnitude >= 4:
-            return "critical"
-        elif magnitude >= 3:
-            return "major"
-        elif magnitude >= 2:
-            return "moderate"
-        elif magnitude >= 1:
-            return "minor"
-        return "low"
+        return _DELAY_SEVERITY[min(max(int(magnitude), 0), len(_DELAY_SEVERITY) - 1)]
 
     async def _get_here_routes(
         self,
@@ -207,7 +440,10 @@ class RoutingService:
         """Fetch routes from HERE Routing API v8."""
         client = await self._get_client()
 
-        return_fields = "polyline,summary,travelSummary"
+        # travelSummary carries the traffic-aware totals, so the plain
+        # summary is not requested; instructions/turnByTurnActions supply
+        # the action text and nextRoad names read below
+        return_fields = "polyline,travelSummary"
         if include_instructions:
             return_fields += ",actions,instructions,turnByTurnActions"
 
@@ -227,7 +463,7 @@ class RoutingService:
             params=params,
         )
         resp.raise_for_status()
-        data = resp.json()
+        data = orjson.loads(resp.content)
 
         routes = []
         for i, route in enumerate(data.get("routes", [])):
@@ -252,8 +488,7 @@ class RoutingService:
                     # Get position for this instruction
                     if action.get("offset") is not None and coords:
                         offset = min(action["offset"], len(coords) - 1)
-                        instruction["lat"] = coords[offset]["lat"]
-                        instruction["lng"] = coords[offset]["lng"]
+                        instruction["lat"], instruction["lng"] = coords[offset]
 
                     # Map HERE action types to standard types
                     instruction["maneuver"] = self._map_here_maneuver(action.get("action", ""))
@@ -298,7 +533,7 @@ class RoutingService:
             params=params,
         )
         resp.raise_for_status()
-        data = resp.json()
+        data = orjson.loads(resp.content)
 
         routes = []
         for i, route in enumerate(data.get("routes", [])):
@@ -306,28 +541,20 @@ class RoutingService:
             legs = route.get("legs", [{}])
 
             # Extract coordinates from legs
-            coords = []
-            for leg in legs:
-                for point in leg.get("points", []):
-                    coords.append({"lat": point["latitude"], "lng": point["longitude"]})
+            coords = [
+                (point["latitude"], point["longitude"])
+                for leg in legs
+                for point in leg.get("points", ())
+            ]
 
             # Extract turn-by-turn instructions
             instructions = []
             if include_instructions:
-                for leg in legs:
-                    for guidance in leg.get("guidance", {}).get("instructions", []):
-                        point = guidance.get("point", {})
-                        instruction = {
-                            "type": guidance.get("maneuver", "STRAIGHT"),
-                            "instruction": guidance.get("message", ""),
-                            "distance_m": guidance.get("routeOffsetInMeters", 0),
-                            "duration_s": 0,  # TomTom doesn't provide per-step duration
-                            "lat": point.get("latitude", 0),
-                            "lng": point.get("longitude", 0),
-                            "maneuver": self._map_tomtom_maneuver(guidance.get("maneuver", "")),
-                            "road_name": guidance.get("street", ""),
-                        }
-                        instructions.append(instruction)
+                instructions = [
+                    self._build_tomtom_instruction(guidance)
+                    for leg in legs
+                    for guidance in leg.get("guidance", {}).get("instructions", ())
+                ]
 
             routes.append({
                 "id": f"tomtom_{i}",
@@ -341,6 +568,20 @@ class RoutingService:
 
         return routes
 
+    def _build_tomtom_instruction(self, guidance: dict) -> dict:
+        """Convert a TomTom guidance instruction to our instruction dict."""
+        point = guidance.get("point", {})
+        return {
+            "type": guidance.get("maneuver", "STRAIGHT"),
+            "instruction": guidance.get("message", ""),
+            "distance_m": guidance.get("routeOffsetInMeters", 0),
+            "duration_s": 0,  # TomTom doesn't provide per-step duration
+            "lat": point.get("latitude", 0),
+            "lng": point.get("longitude", 0),
+            "maneuver": self._map_tomtom_maneuver(guidance.get("maneuver", "")),
+            "road_name": guidance.get("street", ""),
+        }
+
     async def _get_osrm_routes(
         self,
         origin: tuple[float, float],
@@ -349,7 +590,9 @@ class RoutingService:
         include_instructions: bool,
     ) -> list[dict]:
         """Fetch routes from public OSRM (no traffic data)."""
-        client = await self._get_client()
+        # Keyless GET whose body goes straight to orjson, so skip httpx's
+        # response model and use the lighter aiohttp session
+        session = get_aiohttp_session()
 
         coords = f"{origin[1]},{origin[0]};{destination[1]},{destination[0]}"
         params = {
@@ -360,19 +603,18 @@ class RoutingService:
             "annotations": "true",
         }
 
-        resp = await client.get(
+        async with session.get(
             f"https://router.project-osrm.org/route/v1/driving/{coords}",
             params=params,
-        )
-        resp.raise_for_status()
-        data = resp.json()
+        ) as resp:
+            resp.raise_for_status()
+            data = orjson.loads(await resp.read())
 
         routes = []
         for i, route in enumerate(data.get("routes", [])):
             # Decode polyline
             encoded = route.get("geometry", "")
-            decoded = polyline.decode(encoded) if encoded else []
-            route_coords = [{"lat": lat, "lng": lng} for lat, lng in decoded]
+            route_coords = self._decode_osrm_polyline(encoded) if encoded else []
 
             # Extract turn-by-turn instructions
             instructions = []
@@ -420,67 +662,21 @@ class RoutingService:
         """Build human-readable instruction from OSRM maneuver."""
         road_part = f" onto {road_name}" if road_name else ""
 
-        if maneuver_type == "depart":
-            return f"Start{road_part}"
-        elif maneuver_type == "arrive":
-            return "You have arrived at your destination"
-        elif maneuver_type == "turn":
-            return f"Turn {modifier}{road_part}"
-        elif maneuver_type == "merge":
-            return f"Merge {modifier}{road_part}"
-        elif maneuver_type == "ramp":
-            return f"Take the ramp {modifier}{road_part}"
-        elif maneuver_type == "fork":
-            return f"Keep {modifier} at the fork{road_part}"
-        elif maneuver_type == "roundabout":
-            return f"Enter the roundabout{road_part}"
-        elif maneuver_type == "exit roundabout":
-            return f"Exit the roundabout{road_part}"
-        elif maneuver_type == "continue":
-            return f"Continue{road_part}"
-        elif maneuver_type == "new name":
-            return f"Continue onto {road_name}" if road_name else "Continue"
-        else:
-            return f"Continue {modifier}{road_part}".strip()
+        template = _OSRM_TEMPLATES.get(maneuver_type)
+        if template is not None:
+            return template.format(modifier=modifier, road=road_part)
+        return f"Continue {modifier}{road_part}".strip()
 
     def _map_here_maneuver(self, action: str) -> str:
         """Map HERE action type to standard maneuver."""
-        mapping = {
-            "depart": "depart",
-            "arrive": "arrive",
-            "turn": "turn",
-            "continue": "straight",
-            "roundaboutEnter": "roundabout",
-            "roundaboutExit": "roundabout-exit",
-            "ramp": "ramp",
-            "merge": "merge",
-            "fork": "fork",
-            "uTurn": "uturn",
-        }
-        return mapping.get(action, "straight")
+        return _HERE_MANEUVER.get(action, "straight")
 
     def _map_tomtom_maneuver(self, maneuver: str) -> str:
         """Map TomTom maneuver to standard maneuver."""
-        maneuver = maneuver.upper()
-        if "LEFT" in maneuver:
-            return "turn-left"
-        elif "RIGHT" in maneuver:
-            return "turn-right"
-        elif "STRAIGHT" in maneuver:
-            return "straight"
-        elif "UTURN" in maneuver:
-            return "uturn"
-        elif "ROUNDABOUT" in maneuver:
-            return "roundabout"
-        elif "RAMP" in maneuver or "MOTORWAY" in maneuver:
-            return "ramp"
-        elif "MERGE" in maneuver:
-            return "merge"
-        elif "ARRIVE" in maneuver:
-            return "arrive"
-        elif "DEPART" in maneuver:
-            return "depart"
-        return "straight"
+        mapped = _TOMTOM_MANEUVER.get(maneuver)
+        if mapped is None:
+            mapped = _classify_tomtom_maneuver(maneuver.upper())
+        return mapped
 
     def _map_osrm_maneuver(self, maneuver_type: str, modifier: str) -> str:
         """Map OSRM maneuver to standard maneuver."""
@@ -511,22 +707,26 @@ class RoutingService:
             return "roundabout-exit"
         return "straight"
 
-    def _decode_here_polyline(self, encoded: str) -> list[dict]:
-        """Decode HERE's flexible polyline format."""
-        try:
-            # HERE uses flexible polyline encoding
-            decoded = flexpolyline.decode(encoded)
-            # Returns list of (lat, lng) or (lat, lng, altitude) tuples
-            return [{"lat": point[0], "lng": point[1]} for point in decoded]
-        except Exception:
-            # Fallback to standard polyline
+    def _decode_here_polyline(self, encoded: str) -> list[CoordTuple]:
+        """Decode HERE's flexible polyline format (Google-encoded as a fallback)."""
+        # Flexible polylines open with the format version, 1, encoded as "B"
+        if encoded[:1] == "B":
             try:
-                decoded = polyline.decode(encoded)
-                return [{"lat": lat, "lng": lng} for lat, lng in decoded]
-            except Exception:
-                return []
+                return decode_flexpolyline(encoded)
+            except ValueError:
+                pass
+        try:
+            return decode_polyline(encoded)
+        except ValueError:
+            return []
+
+    def _decode_osrm_polyline(self, encoded: str) -> list[CoordTuple]:
+        """Decode OSRM's Google-encoded polyline (precision 5)."""
+        try:
+            return decode_polyline(encoded)
+        except ValueError:
+            return polyline.decode(encoded)
 
     def _generate_route_name(self, index: int) -> str:
         """Generate a human-readable route name."""
-        names = ["Primary Route", "Via Highway", "Local Streets", "Scenic Route"]
-        return names[index] if index < len(names) else f"Route {index + 1}"
+        return _ROUTE_NAMES[index] if index < len(_ROUTE_NAMES) else f"Route {index + 1}"
@@ -1,47 +1,131 @@
 """
-Background scheduler for periodic traffic polling.
-Polls traffic for active commutes and triggers alerts.
+Background poller for active commutes.
+Re-checks routes only while commutes are active and triggers alerts.
 """
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+import asyncio
+import logging
 from typing import Optional
 
 from app.config import get_settings
 
 
-scheduler: Optional[AsyncIOScheduler] = None
+log = logging.getLogger(__name__)
 
 
-async def poll_active_commutes():
+# commute_id -> (origin, destination) for commutes currently being driven
+_active_commutes: dict[str, tuple[tuple[float, float], tuple[float, float]]] = {}
+# commute_id -> id of the route we last recommended
+_last_recommendation: dict[str, str] = {}
+# Set whenever a commute starts so an idle or backed-off poller wakes up
+_wake = asyncio.Event()
+
+_poller_task: Optional[asyncio.Task] = None
+# Bounds upstream route fetches per tick (connection pool, provider quota)
+_poll_semaphore = asyncio.Semaphore(get_settings().poll_concurrency)
+
+
+def activate_commute(commute_id: str, origin: tuple[float, float], destination: tuple[float, float]):
+    """Start polling a commute (the user has started driving)."""
+    _active_commutes[commute_id] = (origin, destination)
+    _wake.set()
+
+
+def deactivate_commute(commute_id: str):
+    """Stop polling a commute."""
+    _active_commutes.pop(commute_id, None)
+    _last_recommendation.pop(commute_id, None)
+
+
+async def poll_active_commutes() -> bool:
     """
-    Background job that polls traffic for active commutes.
-    Called periodically to check if rerouting is recommended.
+    Recalculate routes for every active commute.
+    Returns True if any commute's recommended route changed.
     """
-    # This would:
-    # 1. Get list of "active" commutes (users currently driving)
-    # 2. For each, recalculate routes
-    # 3. If better route found, send notification (websocket/push)
-    pass  # Implementation depends on notification mechanism
+    from app.services.routing import get_routing_service
 
-
-async def start_scheduler():
-    """Start the background scheduler."""
-    global scheduler
     settings = get_settings()
+    routing = get_routing_service()
+    batch = list(_active_commutes.items())
+
+    async def refresh_one(origin, destination):
+        # Same arguments as /routes/calculate, so both share the route
+        # cache and commutes fetched within its TTL cost no upstream call
+        async with _poll_semaphore:
+            return await routing.get_routes(origin, destination)
 
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(
-        poll_active_commutes,
-        trigger=IntervalTrigger(seconds=settings.poll_interval_seconds),
-        id="traffic_poller",
-        replace_existing=True,
+    results = await asyncio.gather(
+        *(refresh_one(origin, destination) for _, (origin, destination) in batch),
+        return_exceptions=True,
     )
-    scheduler.start()
+
+    changed = False
+    for (commute_id, _), routes in zip(batch, results):
+        if isinstance(routes, Exception):
+            log.warning("Error polling commute %s", commute_id, exc_info=routes)
+            continue
+        if not routes or commute_id not in _active_commutes:
+            continue
+
+        # Recommend an alternative only when it beats the primary route
+        # by the reroute threshold
+        primary = routes[0]
+        fastest = min(routes, key=lambda r: r["duration_minutes"])
+        saves = primary["duration_minutes"] - fastest["duration_minutes"]
+        recommended = fastest if saves >= settings.reroute_threshold_minutes else primary
+
+        if _last_recommendation.get(commute_id) != recommended["id"]:
+            _last_recommendation[commute_id] = recommended["id"]
+            changed = True
+            # Notification delivery (websocket/push) hooks in here
+
+    return changed
+
+
+async def _poll_loop():
+    """
+    Sleep until a commute is active, then poll. The interval doubles (up to
+    `poll_max_interval_seconds`) while recommendations are unchanged and
+    resets when one changes or another commute starts.
+    """
+    settings = get_settings()
+    while True:
+        await _wake.wait()
+        _wake.clear()
+        interval = settings.poll_interval_seconds
+
+        while _active_commutes:
+            try:
+                changed = await poll_active_commutes()
+            except Exception:
+                log.exception("Error polling active commutes")
+                changed = False
+
+            if changed:
+                interval = settings.poll_interval_seconds
+            else:
+                interval = min(interval * 2, settings.poll_max_interval_seconds)
+
+            try:
+                await asyncio.wait_for(_wake.wait(), timeout=interval)
+                _wake.clear()
+                interval = settings.poll_interval_seconds
+            except asyncio.TimeoutError:
+                pass
+
+
+async def start_scheduler():
+    """Start the background poller."""
+    global _poller_task
+    _poller_task = asyncio.create_task(_poll_loop())
 
 
 async def stop_scheduler():
-    """Stop the scheduler gracefully."""
-    global scheduler
-    if scheduler:
-        scheduler.shutdown(wait=False)
-        scheduler = None
+    """Stop the poller gracefully."""
+    global _poller_task
+    if _poller_task:
+        _poller_task.cancel()
+        try:
+            await _poller_task
+        except asyncio.CancelledError:
+            pass
+        _poller_task = None
@@ -2,128 +2,319 @@
 Simple file-based storage for commutes and history.
 In production, replace with PostgreSQL or similar.
 """
-import json
+import asyncio
+import bisect
+import os
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
-import uuid
 
+import orjson
+
+from app.ids import new_id
 from app.models import Commute, CommuteHistory
 
 
 DATA_DIR = Path(__file__).parent.parent.parent / "data"
 COMMUTES_FILE = DATA_DIR / "commutes.json"
-HISTORY_FILE = DATA_DIR / "history.json"
+# Append-only JSON Lines log; a later line for an id supersedes earlier ones
+HISTORY_FILE = DATA_DIR / "history.jsonl"
+# History before the log format; migrated on first start
+LEGACY_HISTORY_FILE = DATA_DIR / "history.json"
+
+# Datetimes are written natively as RFC 3339; naive ones are stamped UTC,
+# matching how end_commute interprets them
+_DUMP_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+_LINE_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+# Compact the history log once it has this many lines and more than twice
+# as many lines as live entries
+HISTORY_COMPACT_MIN_LINES = 256
+
+# Commute stats summarize this many most recent trips
+STATS_WINDOW_TRIPS = 30
+
+# Mutations within this window are written back to disk together
+FLUSH_DELAY_SECONDS = 0.1
+
+
+def _atomic_write_bytes(path: Path, payload: bytes):
+    """
+    Replace `path` with `payload` in one write; readers and crashes see
+    either the old file or the new one, never a partial write.
+    """
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _append_bytes(path: Path, payload: bytes):
+    """Append `payload` to `path` in one write."""
+    with open(path, "ab") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _history_lines(entries) -> bytes:
+    return b"".join(orjson.dumps(h, default=str, option=_LINE_OPTIONS) for h in entries)
+
+
+# Fields loaded entries hold as RFC 3339 strings rather than datetimes
+_DATETIME_FIELDS: dict[type, tuple[str, ...]] = {
+    Commute: ("created_at",),
+    CommuteHistory: ("started_at", "ended_at"),
+}
+
+
+def _from_storage(model, entry: dict):
+    """
+    Build a model without validation. Entries only ever come from
+    model_dump() or our own file, so the one thing to restore is datetimes
+    that were read back as strings.
+    """
+    values = dict(entry)
+    for field in _DATETIME_FIELDS[model]:
+        value = values.get(field)
+        if isinstance(value, str):
+            values[field] = datetime.fromisoformat(value)
+    return model.model_construct(**values)
 
 
 class CommuteStorage:
-    """File-based storage for commutes and history."""
+    """
+    File-based storage for commutes and history.
+
+    Both files are loaded once and kept in memory; reads are served from
+    memory. Mutations mark their file dirty and a single delayed write-back
+    persists a burst of them at once; call `aclose()` on shutdown to flush.
+    Commutes are rewritten whole; history changes are appended to a log
+    that is compacted when mostly superseded.
+    Assumes this process is the only writer (the app runs a single worker).
+    """
 
     def __init__(self):
         DATA_DIR.mkdir(exist_ok=True)
         self._ensure_files()
+        # Bumped on every history write so derived views (patterns) can be
+        # cached; the epoch keeps versions from colliding across restarts
+        self._history_epoch = new_id()
+        self._history_versions: dict[str, int] = {}
+
+        self._commutes: list[dict] = self._load_commutes()
+        self._commutes_by_id: dict[str, dict] = {c["id"]: c for c in self._commutes}
+        self._history: list[dict] = self._load_history()
+        self._history_by_id: dict[str, dict] = {h["id"]: h for h in self._history if "id" in h}
+        # Per-commute entries kept sorted by started_at, oldest first, so
+        # the latest k are a slice off the end
+        self._history_by_commute: dict[str, list[dict]] = {}
+        for h in self._history:
+            self._history_by_commute.setdefault(h["commute_id"], []).append(h)
+        for entries in self._history_by_commute.values():
+            entries.sort(key=_started_at_key)
+
+        self._commutes_dirty = False
+        # history id -> entry whose current state still needs appending
+        self._history_pending: dict[str, dict] = {}
+        self._history_compact = False
+        self._flush_task: Optional[asyncio.Task] = None
 
     def _ensure_files(self):
         """Create data files if they don't exist."""
         if not COMMUTES_FILE.exists():
             COMMUTES_FILE.write_text("[]")
         if not HISTORY_FILE.exists():
-            HISTORY_FILE.write_text("[]")
+            if LEGACY_HISTORY_FILE.exists():
+                legacy = orjson.loads(LEGACY_HISTORY_FILE.read_bytes())
+                _atomic_write_bytes(HISTORY_FILE, _history_lines(legacy))
+                os.replace(LEGACY_HISTORY_FILE, LEGACY_HISTORY_FILE.with_suffix(".json.bak"))
+            else:
+                HISTORY_FILE.touch()
 
     def _load_commutes(self) -> list[dict]:
-        return json.loads(COMMUTES_FILE.read_text())
+        return orjson.loads(COMMUTES_FILE.read_bytes())
 
-    def _save_commutes(self, commutes: list[dict]):
-        COMMUTES_FILE.write_text(json.dumps(commutes, indent=2, default=str))
+    def _mark_commutes_dirty(self):
+        self._commutes_dirty = True
+        self._schedule_flush()
 
     def _load_history(self) -> list[dict]:
-        return json.loads(HISTORY_FILE.read_text())
+        """
+        Replay the history log, keeping the last line written for each id.
+        The file is streamed a line at a time, so peak memory is the decoded
+        entries rather than the raw log plus a list of its lines.
+        """
+        entries: dict = {}
+        lines = 0
+        line = b""
+        with HISTORY_FILE.open("rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    h = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue  # torn final line from a crash mid-append
+                lines += 1
+                entries[h.get("id", lines)] = h
+
+        history = list(entries.values())
+        if line and not line.endswith(b"\n"):
+            # Rewrite so the next append doesn't land on the torn line
+            _atomic_write_bytes(HISTORY_FILE, _history_lines(history))
+            lines = len(history)
+        self._history_log_lines = lines
+        return history
+
+    def _mark_history_dirty(self, entry: dict):
+        self._history_pending[entry["id"]] = entry
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Loops so mutations made while a write is in progress aren't dropped
+        while self._commutes_dirty or self._history_pending or self._history_compact:
+            await asyncio.sleep(FLUSH_DELAY_SECONDS)
+            await self._write_dirty()
+
+    async def _write_dirty(self):
+        """Serialize dirty files on the loop, then write them off it."""
+        writes = []
+        if self._commutes_dirty:
+            self._commutes_dirty = False
+            writes.append((_atomic_write_bytes, COMMUTES_FILE, orjson.dumps(self._commutes, default=str, option=_DUMP_OPTIONS)))
+
+        if self._history_pending or self._history_compact:
+            self._history_log_lines += len(self._history_pending)
+            live = len(self._history)
+            if self._history_compact or (
+                self._history_log_lines >= HISTORY_COMPACT_MIN_LINES
+                and self._history_log_lines > 2 * live
+            ):
+                # Pending entries are in self._history already
+                writes.append((_atomic_write_bytes, HISTORY_FILE, _history_lines(self._history)))
+                self._history_log_lines = live
+            else:
+                writes.append((_append_bytes, HISTORY_FILE, _history_lines(self._history_pending.values())))
+            self._history_pending.clear()
+            self._history_compact = False
+
+        for write, path, data in writes:
+            await asyncio.to_thread(write, path, data)
 
-    def _save_history(self, history: list[dict]):
-        HISTORY_FILE.write_text(json.dumps(history, indent=2, default=str))
+    async def aclose(self):
+        """Write back any pending changes."""
+        if self._flush_task is not None:
+            await self._flush_task
+            self._flush_task = None
+        await self._write_dirty()
+
+    async def compact_history(self):
+        """Rewrite the history log with one line per live entry."""
+        self._history_compact = True
+        await self.aclose()
+
+    def _bump_history_version(self, commute_id: str):
+        self._history_versions[commute_id] = self._history_versions.get(commute_id, 0) + 1
+
+    def get_history_version(self, commute_id: str) -> str:
+        """Opaque token that changes whenever a commute's history changes."""
+        return f"{self._history_epoch}:{self._history_versions.get(commute_id, 0)}"
 
     async def save_commute(self, commute: Commute) -> str:
         """Save a new commute."""
-        commutes = self._load_commutes()
-        commutes.append(commute.model_dump())
-        self._save_commutes(commutes)
+        entry = commute.model_dump()
+        self._commutes.append(entry)
+        self._commutes_by_id[entry["id"]] = entry
+        self._mark_commutes_dirty()
         return commute.id
 
     async def get_commute(self, commute_id: str) -> Optional[Commute]:
         """Get a commute by ID."""
-        commutes = self._load_commutes()
-        for c in commutes:
-            if c["id"] == commute_id:
-                return Commute(**c)
-        return None
+        c = self._commutes_by_id.get(commute_id)
+        return _from_storage(Commute, c) if c is not None else None
 
     async def get_all_commutes(self) -> list[Commute]:
         """Get all saved commutes."""
-        commutes = self._load_commutes()
-        return [Commute(**c) for c in commutes]
+        return [_from_storage(Commute, c) for c in self._commutes]
 
     async def delete_commute(self, commute_id: str) -> bool:
         """Delete a commute."""
-        commutes = self._load_commutes()
-        original_len = len(commutes)
-        commutes = [c for c in commutes if c["id"] != commute_id]
-        if len(commutes) < original_len:
-            self._save_commutes(commutes)
-            return True
-        return False
+        if self._commutes_by_id.pop(commute_id, None) is None:
+            return False
+        self._commutes = [c for c in self._commutes if c["id"] != commute_id]
+        self._mark_commutes_dirty()
+        return True
 
     async def update_commute_stats(self, commute_id: str):
-        """Update commute statistics from history."""
-        history = await self.get_history_for_commute(commute_id)
-        if not history:
-            return
-
-        durations = [h.duration_minutes for h in history if h.duration_minutes]
+        """Update commute statistics from its most recent trips."""
+        # A bounded slice off the sorted per-commute index; read the raw
+        # entries rather than building a model per trip
+        recent = self._history_by_commute.get(commute_id, [])[-STATS_WINDOW_TRIPS:]
+        durations = [h["duration_minutes"] for h in recent if h.get("duration_minutes")]
         if not durations:
             return
 
-        commutes = self._load_commutes()
-        for c in commutes:
-            if c["id"] == commute_id:
-                c["avg_duration_minutes"] = sum(durations) / len(durations)
-                c["best_duration_minutes"] = min(durations)
-                c["worst_duration_minutes"] = max(durations)
-                break
-
-        self._save_commutes(commutes)
+        c = self._commutes_by_id.get(commute_id)
+        if c is not None:
+            c["avg_duration_minutes"] = sum(durations) / len(durations)
+            c["best_duration_minutes"] = min(durations)
+            c["worst_duration_minutes"] = max(durations)
+            self._mark_commutes_dirty()
 
     async def save_history(self, history: CommuteHistory) -> str:
         """Save a new history entry."""
-        history_id = str(uuid.uuid4())
-        all_history = self._load_history()
+        history_id = new_id()
         entry = history.model_dump()
         entry["id"] = history_id
-        all_history.append(entry)
-        self._save_history(all_history)
+        self._history.append(entry)
+        self._history_by_id[history_id] = entry
+        # New trips are nearly always the latest, so this lands at the end
+        bisect.insort(
+            self._history_by_commute.setdefault(entry["commute_id"], []),
+            entry,
+            key=_started_at_key,
+        )
+        self._mark_history_dirty(entry)
+        self._bump_history_version(history.commute_id)
         return history_id
 
     async def get_history(self, history_id: str) -> Optional[CommuteHistory]:
         """Get a history entry by ID."""
-        all_history = self._load_history()
-        for h in all_history:
-            if h.get("id") == history_id:
-                return CommuteHistory(**h)
-        return None
+        h = self._history_by_id.get(history_id)
+        return _from_storage(CommuteHistory, h) if h is not None else None
 
     async def update_history(self, history_id: str, **updates):
         """Update a history entry."""
-        all_history = self._load_history()
-        for h in all_history:
-            if h.get("id") == history_id:
-                h.update(updates)
-                break
-        self._save_history(all_history)
+        h = self._history_by_id.get(history_id)
+        if h is not None:
+            h.update(updates)
+            if "started_at" in updates:
+                self._history_by_commute[h["commute_id"]].sort(key=_started_at_key)
+            self._bump_history_version(h["commute_id"])
+            self._mark_history_dirty(h)
 
     async def get_history_for_commute(
         self, commute_id: str, limit: int = 30
     ) -> list[CommuteHistory]:
-        """Get history for a specific commute."""
-        all_history = self._load_history()
-        filtered = [h for h in all_history if h["commute_id"] == commute_id]
-        # Sort by started_at descending
-        filtered.sort(key=lambda h: h.get("started_at", ""), reverse=True)
-        return [CommuteHistory(**h) for h in filtered[:limit]]
+        """Get history for a specific commute, most recent first."""
+        entries = self._history_by_commute.get(commute_id, [])
+        return [_from_storage(CommuteHistory, h) for h in reversed(entries[-limit:])] if limit > 0 else []
+
+
+def _started_at_key(h: dict) -> str:
+    """
+    Sortable started_at. Loaded entries hold strings and fresh ones hold
+    datetimes; entries written before storage used orjson have a space
+    rather than "T" between date and time.
+    """
+    started_at = h.get("started_at", "")
+    if isinstance(started_at, str):
+        return started_at.replace(" ", "T", 1)
+    return started_at.isoformat()
@@ -3,11 +3,25 @@ Traffic data aggregation from multiple sources.
 Combines TomTom, HERE, and state DOT feeds for comprehensive coverage.
 """
 import httpx
-from typing import Optional
-from datetime import datetime
+import numpy as np
+from collections import OrderedDict
+from typing import Final, Optional
+from datetime import datetime, timezone
 import asyncio
+import time
 
 from app.config import get_settings
+from app.models import CoordTuple
+from app.services.http_client import get_http_client
+
+
+# Flow lookups are cached on a ~100m grid; overlapping routes share them
+POINT_CACHE_MAX_ENTRIES = 2048
+POINT_CACHE_TTL_SECONDS = 60
+
+# Parsed once rather than on every per-point request
+_TOMTOM_FLOW_URL: Final = httpx.URL("https://api.tomtom.com/traffic/services/4/flowSegmentData/relative0/10/json")
+_HERE_FLOW_URL: Final = httpx.URL("https://data.traffic.hereapi.com/v7/flow")
 
 
 class TrafficAggregator:
@@ -18,20 +32,20 @@ class TrafficAggregator:
 
     def __init__(self):
         self.settings = get_settings()
-        self._client: Optional[httpx.AsyncClient] = None
         self._cache: dict = {}  # Simple in-memory cache
+        # (source, lat, lng) -> (fetched_at monotonic, speed ratios), LRU order
+        self._point_cache: OrderedDict[tuple, tuple[float, list[float]]] = OrderedDict()
+        self._semaphore = asyncio.Semaphore(self.settings.traffic_max_concurrency)
 
     async def _get_client(self) -> httpx.AsyncClient:
-        if self._client is None:
-            self._client = httpx.AsyncClient(timeout=30.0)
-        return self._client
+        return get_http_client()
 
     async def get_traffic_for_routes(self, routes: list[dict]) -> list[dict]:
         """
         Get current traffic conditions for multiple routes.
         Returns traffic data aligned with input routes.
         """
-        tasks = [self._get_traffic_for_route(route) for route in routes]
+        tasks = [self._get_traffic_for_route_bounded(route) for route in routes]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
         traffic_data = []
@@ -43,6 +57,11 @@ class TrafficAggregator:
 
         return traffic_data
 
+    async def _get_traffic_for_route_bounded(self, route: dict) -> dict:
+        """Fetch a route's traffic, limiting how many routes are in flight."""
+        async with self._semaphore:
+            return await self._get_traffic_for_route(route)
+
     async def _get_traffic_for_route(self, route: dict) -> dict:
         """Get traffic for a single route by sampling points along it."""
         geometry = route.get("geometry", [])
@@ -60,19 +79,21 @@ class TrafficAggregator:
         )
 
         # Aggregate results
-        speeds = []
+        speed_sum = 0.0
+        speed_count = 0
         incidents = []
 
         for data in sources_data:
             if isinstance(data, dict):
-                speeds.extend(data.get("speeds", []))
+                speed_sum += data.get("speed_sum", 0.0)
+                speed_count += data.get("speed_count", 0)
                 incidents.extend(data.get("incidents", []))
 
-        if not speeds:
+        if not speed_count:
             return {"level": "unknown", "reason": "no data from sources"}
 
         # Calculate overall traffic level
-        avg_speed_ratio = sum(speeds) / len(speeds) if speeds else 1.0
+        avg_speed_ratio = speed_sum / speed_count
         level = self._speed_ratio_to_level(avg_speed_ratio)
 
         return {
@@ -80,86 +101,127 @@ class TrafficAggregator:
             "avg_speed_ratio": avg_speed_ratio,  # 1.0 = free flow, 0.5 = half speed
             "incidents": incidents,
             "sample_points": len(sample_points),
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
         }
 
-    async def _get_tomtom_traffic(self, points: list[dict]) -> dict:
+    async def _get_tomtom_traffic(self, points: list[CoordTuple]) -> dict:
         """Get traffic flow from TomTom for sample points."""
         if not self.settings.tomtom_api_key:
-            return {"speeds": [], "incidents": []}
+            return {"speed_sum": 0.0, "speed_count": 0, "incidents": []}
 
         client = await self._get_client()
-        speeds = []
-        incidents = []
+        api_key = self.settings.tomtom_api_key
 
-        for point in points[:5]:  # Limit API calls
-            try:
-                # TomTom Traffic Flow API
-                resp = await client.get(
-                    f"https://api.tomtom.com/traffic/services/4/flowSegmentData/relative0/10/json",
-                    params={
-                        "key": self.settings.tomtom_api_key,
-                        "point": f"{point['lat']},{point['lng']}",
-                    },
-                )
-                if resp.status_code == 200:
-                    data = resp.json()
-                    flow = data.get("flowSegmentData", {})
-                    current = flow.get("currentSpeed", 0)
-                    free_flow = flow.get("freeFlowSpeed", 1)
-                    if free_flow > 0:
-                        speeds.append(current / free_flow)
-            except Exception:
-                continue
+        def fetch(point: CoordTuple):
+            # TomTom Traffic Flow API
+            return client.get(
+                _TOMTOM_FLOW_URL,
+                params={"key": api_key, "point": f"{point[0]},{point[1]}"},
+            )
 
-        return {"speeds": speeds, "incidents": incidents}
+        def parse(data: dict) -> list[float]:
+            flow = data.get("flowSegmentData", {})
+            current = flow.get("currentSpeed", 0)
+            free_flow = flow.get("freeFlowSpeed", 1)
+            return [current / free_flow] if free_flow > 0 else []
 
-    async def _get_here_traffic(self, points: list[dict]) -> dict:
+        speed_sum, speed_count = await self._get_point_speeds("tomtom", points[:5], fetch, parse)  # Limit API calls
+        return {"speed_sum": speed_sum, "speed_count": speed_count, "incidents": []}
+
+    async def _get_here_traffic(self, points: list[CoordTuple]) -> dict:
         """Get traffic flow from HERE for sample points."""
         if not self.settings.here_api_key:
-            return {"speeds": [], "incidents": []}
+            return {"speed_sum": 0.0, "speed_count": 0, "incidents": []}
 
         client = await self._get_client()
-        speeds = []
-        incidents = []
+        api_key = self.settings.here_api_key
+
+        def fetch(point: CoordTuple):
+            # HERE Traffic Flow API
+            return client.get(
+                _HERE_FLOW_URL,
+                params={
+                    "apiKey": api_key,
+                    "in": f"circle:{point[0]},{point[1]};r=500",
+                    "locationReferencing": "none",
+                },
+            )
+
+        def parse(data: dict) -> list[float]:
+            ratios = []
+            for result in data.get("results", []):
+                current_flow = result.get("currentFlow", {})
+                speed = current_flow.get("speed", 0)
+                free_flow = current_flow.get("freeFlow", 1)
+                if free_flow > 0:
+                    ratios.append(speed / free_flow)
+            return ratios
+
+        speed_sum, speed_count = await self._get_point_speeds("here", points[:5], fetch, parse)
+        return {"speed_sum": speed_sum, "speed_count": speed_count, "incidents": []}
+
+    async def _get_point_speeds(self, source: str, points: list[CoordTuple], fetch, parse) -> tuple[float, int]:
+        """
+        Sum and count of the speed ratios at each point, from the point
+        cache where fresh and otherwise from concurrent upstream requests.
+        Failed points are skipped and not cached.
+        """
+        keys = [(source, round(point[0], 3), round(point[1], 3)) for point in points]
+        per_point = [self._cached_point_speeds(key) for key in keys]
+        misses = [i for i, ratios in enumerate(per_point) if ratios is None]
+
+        responses = await asyncio.gather(
+            *(fetch(points[i]) for i in misses),
+            return_exceptions=True,
+        )
 
-        for point in points[:5]:
+        for i, resp in zip(misses, responses):
             try:
-                # HERE Traffic Flow API
-                resp = await client.get(
-                    "https://data.traffic.hereapi.com/v7/flow",
-                    params={
-                        "apiKey": self.settings.here_api_key,
-                        "in": f"circle:{point['lat']},{point['lng']};r=500",
-                        "locationReferencing": "none",
-                    },
-                )
-                if resp.status_code == 200:
-                    data = resp.json()
-                    for result in data.get("results", []):
-                        current_flow = result.get("currentFlow", {})
-                        speed = current_flow.get("speed", 0)
-                        free_flow = current_flow.get("freeFlow", 1)
-                        if free_flow > 0:
-                            speeds.append(speed / free_flow)
+                if isinstance(resp, httpx.Response) and resp.status_code == 200:
+                    per_point[i] = parse(resp.json())
+                    self._store_point_speeds(keys[i], per_point[i])
             except Exception:
                 continue
 
-        return {"speeds": speeds, "incidents": incidents}
+        speed_sum = 0.0
+        speed_count = 0
+        for ratios in per_point:
+            if ratios:
+                speed_sum += sum(ratios)
+                speed_count += len(ratios)
+        return speed_sum, speed_count
+
+    def _cached_point_speeds(self, key: tuple) -> Optional[list[float]]:
+        cached = self._point_cache.get(key)
+        if cached is None:
+            return None
+        if time.monotonic() - cached[0] >= POINT_CACHE_TTL_SECONDS:
+            del self._point_cache[key]
+            return None
+        self._point_cache.move_to_end(key)
+        return cached[1]
+
+    def _store_point_speeds(self, key: tuple, ratios: list[float]):
+        self._point_cache[key] = (time.monotonic(), ratios)
+        self._point_cache.move_to_end(key)
+        if len(self._point_cache) > POINT_CACHE_MAX_ENTRIES:
+            self._point_cache.popitem(last=False)
 
     async def get_traffic_by_route_id(self, route_id: str) -> Optional[dict]:
         """Get cached traffic for a route ID."""
         return self._cache.get(route_id)
 
     def _sample_route_points(
-        self, geometry: list[dict], max_points: int = 10
-    ) -> list[dict]:
-        """Sample evenly-spaced points along a route."""
+        self, geometry: list[CoordTuple], max_points: int = 10
+    ) -> list[CoordTuple]:
+        """Sample evenly-spaced points along a route, including both ends."""
         if len(geometry) <= max_points:
             return geometry
 
-        step = len(geometry) // max_points
-        return [geometry[i] for i in range(0, len(geometry), step)][:max_points]
+        # Only the sampled indices are computed; the coordinates themselves
+        # stay the original tuples so the point cache keys are unchanged
+        indices = np.linspace(0, len(geometry) - 1, max_points).astype(np.intp)
+        return [geometry[i] for i in indices.tolist()]
 
     def _speed_ratio_to_level(self, ratio: float) -> str:
         """Convert speed ratio to human-readable level."""
@@ -1,9 +1,68 @@
 """Weather service for getting current conditions along commute route."""
+import asyncio
+import logging
 import os
-import httpx
+import time
+import zlib
+from collections import OrderedDict
 from typing import Optional
-from datetime import datetime, timedelta
-from functools import lru_cache
+
+from app.services.http_client import get_http_client
+
+
+log = logging.getLogger(__name__)
+
+WEATHER_CACHE_MAX_ENTRIES = 1024
+WEATHER_CACHE_TTL_SECONDS = 600
+
+
+def _cache_key(lat: float, lng: float) -> str:
+    """Weather is cached per ~1km grid cell."""
+    return f"{lat:.2f},{lng:.2f}"
+
+
+def _condition_impact(condition_id: int) -> int:
+    """Driving impact score contributed by an OpenWeatherMap condition ID."""
+    # Thunderstorm - severe impact
+    if 200 <= condition_id < 300:
+        return 4
+    # Heavy rain (502+) / other rain
+    if 500 <= condition_id < 600:
+        return 3 if condition_id >= 502 else 1
+    # Heavy snow (602+) / other snow
+    if 600 <= condition_id < 700:
+        return 4 if condition_id >= 602 else 2
+    # Fog (741) / mist, haze, etc.
+    if 700 <= condition_id < 800:
+        return 3 if condition_id == 741 else 1
+    return 0
+
+
+def _condition_warnings(condition_id: int, low_visibility: bool) -> tuple[str, ...]:
+    """Condition- and visibility-specific warnings, in display order."""
+    warnings = []
+    if 200 <= condition_id < 300:
+        warnings.append("Thunderstorm activity - use caution")
+    if 600 <= condition_id < 700:
+        warnings.append("Snowy conditions - reduce speed")
+    if condition_id == 741 or low_visibility:
+        warnings.append("Low visibility - use fog lights")
+    if 500 <= condition_id < 600 and condition_id >= 502:
+        warnings.append("Heavy rain - maintain safe following distance")
+    return tuple(warnings)
+
+
+# Precomputed over the OpenWeatherMap condition ID space (2xx-8xx)
+_CONDITION_IMPACT: dict[int, int] = {
+    cid: score for cid in range(200, 900) if (score := _condition_impact(cid))
+}
+_CONDITION_WARNINGS: dict[tuple[int, bool], tuple[str, ...]] = {
+    (cid, low_visibility): _condition_warnings(cid, low_visibility)
+    for cid in range(200, 900)
+    for low_visibility in (False, True)
+}
+
+_weather_service: Optional["WeatherService"] = None
 
 
 class WeatherService:
@@ -12,8 +71,8 @@ class WeatherService:
     def __init__(self):
         self.api_key = os.getenv("OPENWEATHERMAP_API_KEY", "")
         self.base_url = "https://api.openweathermap.org/data/2.5"
-        self._cache: dict = {}
-        self._cache_ttl = timedelta(minutes=10)
+        # cache key -> (fetched_at monotonic, weather), LRU order
+        self._cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
 
     async def get_weather(
         self,
@@ -32,37 +91,43 @@ class WeatherService:
         - driving_impact (none, low, moderate, high, severe)
         """
         # Check cache first
-        cache_key = f"{lat:.2f},{lng:.2f}"
-        if cache_key in self._cache:
-            cached_data, cached_time = self._cache[cache_key]
-            if datetime.utcnow() - cached_time < self._cache_ttl:
-                return cached_data
+        cache_key = _cache_key(lat, lng)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            if time.monotonic() - cached[0] < WEATHER_CACHE_TTL_SECONDS:
+                self._cache.move_to_end(cache_key)
+                return cached[1]
+            del self._cache[cache_key]
 
         # If no API key, return mock data for demo
         if not self.api_key:
             return self._get_demo_weather(lat, lng)
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/weather",
-                    params={
-                        "lat": lat,
-                        "lon": lng,
-                        "appid": self.api_key,
-                        "units": "metric",
-                    },
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                weather = self._parse_weather(data)
-                self._cache[cache_key] = (weather, datetime.utcnow())
-                return weather
+            # Shared pooled client, so repeat lookups reuse the connection
+            client = get_http_client()
+            response = await client.get(
+                f"{self.base_url}/weather",
+                params={
+                    "lat": lat,
+                    "lon": lng,
+                    "appid": self.api_key,
+                    "units": "metric",
+                },
+                timeout=10.0,
+            )
+            response.raise_for_status()
+            data = response.json()
+
+            weather = self._parse_weather(data)
+            self._cache[cache_key] = (time.monotonic(), weather)
+            self._cache.move_to_end(cache_key)
+            if len(self._cache) > WEATHER_CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+            return weather
 
         except Exception as e:
-            print(f"Weather API error: {e}")
+            log.warning("Weather API error: %s", e)
             return self._get_demo_weather(lat, lng)
 
     def _parse_weather(self, data: dict) -> dict:
@@ -126,32 +191,8 @@ class WeatherService:
         - 800: Clear
         - 80x: Clouds
         """
-        impact_score = 0
-
-        # Thunderstorm - severe impact
-        if 200 <= condition_id < 300:
-            impact_score += 4
-
-        # Heavy rain
-        if 500 <= condition_id < 600:
-            if condition_id >= 502:  # Heavy rain
-                impact_score += 3
-            else:
-                impact_score += 1
-
-        # Snow
-        if 600 <= condition_id < 700:
-            if condition_id >= 602:  # Heavy snow
-                impact_score += 4
-            else:
-                impact_score += 2
-
-        # Fog/mist/haze
-        if 700 <= condition_id < 800:
-            if condition_id == 741:  # Fog
-                impact_score += 3
-            else:
-                impact_score += 1
+        # Condition (thunderstorm, rain, snow, fog) from the precomputed table
+        impact_score = _CONDITION_IMPACT.get(condition_id, 0)
 
         # Visibility impact
         if visibility < 1000:
@@ -197,19 +238,9 @@ class WeatherService:
         if impact == "none":
             return None
 
-        warnings = []
-
-        if 200 <= condition_id < 300:
-            warnings.append("Thunderstorm activity - use caution")
-
-        if 600 <= condition_id < 700:
-            warnings.append("Snowy conditions - reduce speed")
-
-        if condition_id == 741 or visibility < 1000:
-            warnings.append("Low visibility - use fog lights")
-
-        if 500 <= condition_id < 600 and condition_id >= 502:
-            warnings.append("Heavy rain - maintain safe following distance")
+        key = (condition_id, visibility < 1000)
+        cached = _CONDITION_WARNINGS.get(key)
+        warnings = list(cached if cached is not None else _condition_warnings(*key))
 
         if not warnings:
             if impact == "severe":
@@ -223,9 +254,9 @@ class WeatherService:
 
     def _get_demo_weather(self, lat: float, lng: float) -> dict:
         """Return demo weather data when no API key is configured."""
-        # Generate slightly varied demo data based on coordinates
-        import hashlib
-        seed = int(hashlib.md5(f"{lat}{lng}".encode()).hexdigest()[:8], 16)
+        # Generate slightly varied demo data based on coordinates; any
+        # stable hash will do, it only seeds the variation
+        seed = zlib.crc32(f"{lat}{lng}".encode())
 
         conditions = [
             ("clear", 800, "clear sky", "01d"),
@@ -265,8 +296,14 @@ class WeatherService:
 
         Returns weather at origin, destination, and overall route impact.
         """
-        origin_weather = await self.get_weather(origin[0], origin[1])
-        dest_weather = await self.get_weather(destination[0], destination[1])
+        if _cache_key(*origin) == _cache_key(*destination):
+            # Same grid cell: one lookup serves both ends
+            origin_weather = dest_weather = await self.get_weather(origin[0], origin[1])
+        else:
+            origin_weather, dest_weather = await asyncio.gather(
+                self.get_weather(origin[0], origin[1]),
+                self.get_weather(destination[0], destination[1]),
+            )
 
         # Determine worst impact along route
         impact_levels = ["none", "low", "moderate", "high", "severe"]
@@ -287,3 +324,11 @@ class WeatherService:
             "route_impact": worst_impact,
             "warnings": warnings,
         }
+
+
+def get_weather_service() -> WeatherService:
+    """Shared WeatherService, so its weather cache spans all requests."""
+    global _weather_service
+    if _weather_service is None:
+        _weather_service = WeatherService()
+    return _weather_service
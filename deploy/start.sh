@@ -5,8 +5,13 @@ echo "Starting Wayfinder..."
 
 # Start FastAPI backend in background
 cd /app
+# uvloop/httptools come with uvicorn[standard]. Storage is file-based and
+# caches are in-process, so keep a single worker unless that changes.
 echo "Starting uvicorn..."
-uvicorn app.main:app --host 127.0.0.1 --port 8000 &
+uvicorn app.main:app --host 127.0.0.1 --port 8000 \
+    --workers "${WEB_CONCURRENCY:-1}" \
+    --loop uvloop \
+    --http httptools &
 
 # Wait for backend to be ready
 sleep 3